@@ -178,6 +178,9 @@ def on_chat_resume(func: Callable[[ThreadDict], Any]) -> Callable:
     """
     Hook to react to resume websocket connection event.
 
+    The hook receives the whole thread, while the UI only loads its
+    `resume_page_size` most recent root steps (see the config).
+
     Args:
         func (Callable[], Any]): The connection hook to execute.
 
@@ -1,17 +1,26 @@
+import hashlib
 import os
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple, Union
 
 import jwt
 from chainlit.config import config
 from chainlit.data import get_data_layer
 from chainlit.oauth_providers import get_configured_oauth_providers
-from chainlit.user import User
+from chainlit.user import PersistedUser, User
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 
 reuseable_oauth = OAuth2PasswordBearer(tokenUrl="/login", auto_error=False)
 
+# Users recently authenticated, by hash of their token, so HTTP requests and
+# websocket connections do not query the data layer each time
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 1024
+_user_cache = OrderedDict()  # type: OrderedDict[str, Tuple[float, User]]
+
 
 def get_jwt_secret():
     return os.environ.get("CHAINLIT_AUTH_SECRET")
@@ -59,7 +68,43 @@ def create_jwt(data: User) -> str:
     return encoded_jwt
 
 
+def get_token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def cache_user(token: str, user: Union[User, PersistedUser], expires_at: float):
+    # Never keep a user past the expiration of its token
+    ttl = min(USER_CACHE_TTL, expires_at - time.time())
+    if ttl <= 0:
+        return
+    key = get_token_key(token)
+    _user_cache[key] = (time.monotonic() + ttl, user)
+    _user_cache.move_to_end(key)
+    while len(_user_cache) > USER_CACHE_MAX_SIZE:
+        _user_cache.popitem(last=False)
+
+
+def get_cached_user(token: str) -> Optional[Union[User, PersistedUser]]:
+    key = get_token_key(token)
+    entry = _user_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _user_cache[key]
+        return None
+    _user_cache.move_to_end(key)
+    return entry[1]
+
+
+def invalidate_cached_user(token: Optional[str]):
+    """Forget the user authenticated with a token, on logout."""
+    if token:
+        _user_cache.pop(get_token_key(token), None)
+
+
 async def authenticate_user(token: str = Depends(reuseable_oauth)):
+    if token and (cached_user := get_cached_user(token)):
+        return cached_user
     try:
         dict = jwt.decode(
             token,
@@ -67,7 +112,7 @@ async def authenticate_user(token: str = Depends(reuseable_oauth)):
             algorithms=["HS256"],
             options={"verify_signature": True},
         )
-        del dict["exp"]
+        expires_at = dict.pop("exp")
         user = User(**dict)
     except Exception as e:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
@@ -77,10 +122,14 @@ async def authenticate_user(token: str = Depends(reuseable_oauth)):
             if persisted_user == None:
                 persisted_user = await data_layer.create_user(user)
         except Exception as e:
+            # Not cached, the data layer is queried again on the next request
             return user
 
+        if persisted_user:
+            cache_user(token, persisted_user, expires_at)
         return persisted_user
     else:
+        cache_user(token, user, expires_at)
         return user
 
 
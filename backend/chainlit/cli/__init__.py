@@ -32,8 +32,22 @@ def cli():
     return
 
 
+def create_worker_app():
+    """Application factory of the worker processes started when running with several workers."""
+    target = os.environ["CHAINLIT_WORKER_TARGET"]
+    config.run.host = os.environ.get("CHAINLIT_HOST", DEFAULT_HOST)
+    config.run.port = int(os.environ.get("CHAINLIT_PORT", DEFAULT_PORT))
+    # Do not open one browser tab per worker
+    config.run.headless = True
+    config.run.module_name = target
+    load_module(target)
+    register_wildcard_route_handler()
+    init_lc_cache()
+    return app
+
+
 # Define the function to run Chainlit with provided options
-def run_chainlit(target: str):
+def run_chainlit(target: str, workers: int = 1):
     host = os.environ.get("CHAINLIT_HOST", DEFAULT_HOST)
     port = int(os.environ.get("CHAINLIT_PORT", DEFAULT_PORT))
 
@@ -66,6 +80,25 @@ def run_chainlit(target: str):
 
     log_level = "debug" if config.run.debug else "error"
 
+    if workers > 1:
+        if not os.environ.get("CHAINLIT_SESSION_REGISTRY"):
+            logger.warning(
+                "Running several workers without CHAINLIT_SESSION_REGISTRY, reconnecting clients must reach the same worker"
+            )
+        # Each worker loads the app module in its own process
+        os.environ["CHAINLIT_WORKER_TARGET"] = os.path.abspath(target)
+        uvicorn.run(
+            "chainlit.cli:create_worker_app",
+            factory=True,
+            host=host,
+            port=port,
+            workers=workers,
+            log_level=log_level,
+            ws_per_message_deflate=ws_per_message_deflate,
+            loop="asyncio",
+        )
+        return
+
     # Start the server
     async def start():
         config = uvicorn.Config(
@@ -127,7 +160,14 @@ def run_chainlit(target: str):
 )
 @click.option("--host", help="Specify a different host to run the server on")
 @click.option("--port", help="Specify a different port to run the server on")
-def chainlit_run(target, watch, headless, debug, ci, no_cache, host, port):
+@click.option(
+    "--workers",
+    default=1,
+    type=int,
+    envvar="WORKERS",
+    help="Number of worker processes, see CHAINLIT_SESSION_REGISTRY and CHAINLIT_SOCKETIO_MESSAGE_QUEUE to share the sessions",
+)
+def chainlit_run(target, watch, headless, debug, ci, no_cache, host, port, workers):
     if host:
         os.environ["CHAINLIT_HOST"] = host
     if port:
@@ -150,7 +190,10 @@ def chainlit_run(target, watch, headless, debug, ci, no_cache, host, port):
     config.run.ci = ci
     config.run.watch = watch
 
-    run_chainlit(target)
+    if watch and workers > 1:
+        raise click.UsageError("--watch can not be used with several workers")
+
+    run_chainlit(target, workers)
 
 
 @cli.command("hello")
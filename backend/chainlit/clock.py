@@ -0,0 +1,39 @@
+import threading
+from datetime import datetime, timedelta
+
+_RESOLUTION = timedelta(microseconds=1)
+
+
+class MonotonicClock:
+    """
+    Source of strictly increasing UTC timestamps.
+
+    Steps and messages are ordered by their creation timestamp. Objects created
+    within the same microsecond, or while the system clock goes backwards, get
+    the previous timestamp plus one microsecond instead, so timestamps never
+    collide and never go back in time.
+    """
+
+    def __init__(self):
+        self._last = datetime.min
+        self._lock = threading.Lock()
+
+    def now(self) -> datetime:
+        current = datetime.utcnow()
+        with self._lock:
+            if current <= self._last:
+                current = self._last + _RESOLUTION
+            self._last = current
+        return current
+
+    def isoformat(self) -> str:
+        # Always include the microseconds so that the strings sort like the dates
+        return self.now().isoformat(timespec="microseconds")
+
+
+clock = MonotonicClock()
+
+
+def utc_now() -> str:
+    """Return a unique, increasing ISO formatted UTC timestamp."""
+    return clock.isoformat()
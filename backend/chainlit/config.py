@@ -56,6 +56,21 @@ allow_origins = ["*"]
 # Follow symlink for asset mount (see https://github.com/Chainlit/chainlit/issues/317)
 # follow_symlink = false
 
+# Streamed tokens are sent in batches, at most every stream_token_interval seconds
+# or when stream_token_max_size characters are pending. Set the interval to 0 to send every token.
+# stream_token_interval = 0.03
+# stream_token_max_size = 1024
+
+# Number of messages sent when resuming a thread, older ones are loaded on demand.
+# Set to 0 to send the whole thread at once.
+# resume_page_size = 50
+
+# Maximum size (in MB) of an uploaded file, of all the files of a session and of
+# the files of all the sessions of the server.
+# upload_max_size_mb = 100
+# session_upload_quota_mb = 500
+# upload_quota_mb = 5000
+
 [features]
 # Show the prompt playground
 prompt_playground = true
@@ -246,6 +261,15 @@ class ProjectSettings(DataClassJsonMixin):
     cache: bool = False
     # Follow symlink for asset mount (see https://github.com/Chainlit/chainlit/issues/317)
     follow_symlink: bool = False
+    # Time window (in seconds) and size (in characters) of the streamed tokens batches
+    stream_token_interval: float = 0.03
+    stream_token_max_size: int = 1024
+    # Number of root steps sent when resuming a thread, 0 for all of them
+    resume_page_size: int = 50
+    # Upload limits (in MB) per file, per session and for the whole server
+    upload_max_size_mb: int = 100
+    session_upload_quota_mb: int = 500
+    upload_quota_mb: int = 5000
 
 
 @dataclass()
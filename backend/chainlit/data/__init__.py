@@ -1,15 +1,31 @@
+import asyncio
 import functools
 import json
 import os
-from collections import deque
-from typing import TYPE_CHECKING, Dict, List, Optional, Union
+import uuid
+from collections import defaultdict
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
 
-import aiofiles
+import httpx
 from chainlit.config import config
 from chainlit.context import context
+from chainlit.data.batch import StepBatcher
+from chainlit.data.thread_cache import (
+    cached_thread,
+    cached_thread_author,
+    invalidate_thread_cache,
+)
+from chainlit.files import FileChunkReader
 from chainlit.logger import logger
 from chainlit.session import WebsocketSession
-from chainlit.types import Feedback, Pagination, ThreadDict, ThreadFilter
+from chainlit.types import (
+    Feedback,
+    PagedThreadDict,
+    Pagination,
+    ThreadDict,
+    ThreadFilter,
+    ThreadPageDict,
+)
 from chainlit.user import PersistedUser, User, UserDict
 from literalai import Attachment
 from literalai import Feedback as ClientFeedback
@@ -23,23 +39,20 @@ if TYPE_CHECKING:
     from chainlit.element import Element, ElementDict
     from chainlit.step import FeedbackDict, StepDict
 
-_data_layer = None
+_data_layer = None  # type: Optional[BaseDataLayer]
 
 
 def queue_until_user_message():
     def decorator(method):
         @functools.wraps(method)
         async def wrapper(self, *args, **kwargs):
-            if (
-                isinstance(context.session, WebsocketSession)
-                and not context.session.has_first_interaction
+            if isinstance(context.session, WebsocketSession) and (
+                not context.session.has_first_interaction
+                # Keep the order with the writes still being replayed
+                or context.session.persistence_journal.active
             ):
-                # Queue the method invocation waiting for the first user message
-                queues = context.session.thread_queues
-                method_name = method.__name__
-                if method_name not in queues:
-                    queues[method_name] = deque()
-                queues[method_name].append((method, self, args, kwargs))
+                # Journal the method invocation waiting for the first user message
+                context.session.persistence_journal.record(method, self, args, kwargs)
 
             else:
                 # Otherwise, Execute the method immediately
@@ -50,6 +63,53 @@ def queue_until_user_message():
     return decorator
 
 
+def paginate_thread_steps(thread: ThreadDict, pagination: Pagination) -> ThreadPageDict:
+    """
+    Page of the steps of a thread, from the most recent ones. A page holds
+    `pagination.first` root steps with all their children, the cursor being the
+    id of the oldest root step of the previous page. A non positive
+    `pagination.first` returns all the steps.
+    """
+    steps = thread["steps"]
+    step_ids = {step["id"] for step in steps}
+    children = defaultdict(list)  # type: Dict[str, List[str]]
+    roots = []  # type: List[str]
+    for step in steps:
+        # Steps whose parent is not in the thread (hidden chain of thought) are roots
+        if (parent_id := step.get("parentId")) and parent_id in step_ids:
+            children[parent_id].append(step["id"])
+        else:
+            roots.append(step["id"])
+
+    end = len(roots)
+    if pagination.cursor:
+        end = roots.index(pagination.cursor) if pagination.cursor in roots else 0
+    start = max(end - pagination.first, 0) if pagination.first > 0 else 0
+
+    page_ids = set()
+    pending = roots[start:end]
+    while pending:
+        step_id = pending.pop()
+        page_ids.add(step_id)
+        pending.extend(children[step_id])
+
+    elements = [
+        element
+        for element in thread.get("elements") or []
+        if element.get("forId") in page_ids
+        # Elements not linked to a step come with the most recent page
+        or (not pagination.cursor and element.get("forId") not in step_ids)
+    ]
+    return {
+        "steps": [step for step in steps if step["id"] in page_ids],
+        "elements": elements,
+        "pageInfo": {
+            "hasNextPage": start > 0,
+            "endCursor": roots[start] if start < end else None,
+        },
+    }
+
+
 class BaseDataLayer:
     """Base class for data persistence."""
 
@@ -106,6 +166,29 @@ class BaseDataLayer:
     async def get_thread(self, thread_id: str) -> "Optional[ThreadDict]":
         return None
 
+    async def get_thread_steps(
+        self, thread_id: str, pagination: "Pagination"
+    ) -> "Optional[ThreadPageDict]":
+        thread = await self.get_thread(thread_id)
+        if not thread:
+            return None
+        return paginate_thread_steps(thread, pagination)
+
+    async def get_thread_page(
+        self, thread_id: str, pagination: "Pagination"
+    ) -> "Optional[PagedThreadDict]":
+        """The thread with the most recent page of its steps, to resume it."""
+        thread = await self.get_thread(thread_id)
+        if not thread:
+            return None
+        page = paginate_thread_steps(thread, pagination)
+        return {
+            **thread,
+            "steps": page["steps"],
+            "elements": page["elements"],
+            "pageInfo": page["pageInfo"],
+        }
+
     async def update_thread(
         self,
         thread_id: str,
@@ -119,14 +202,30 @@ class BaseDataLayer:
     async def delete_user_session(self, id: str) -> bool:
         return True
 
+    async def flush(self):
+        """Write the pending batched operations, if any."""
+        pass
+
 
-class ChainlitDataLayer:
-    def __init__(self, api_key: str, server: Optional[str]):
+class ChainlitDataLayer(BaseDataLayer):
+    def __init__(
+        self,
+        api_key: str,
+        server: Optional[str],
+        batch_size: int = 50,
+        batch_interval: float = 0.1,
+    ):
         from literalai import LiteralClient
 
         self.client = LiteralClient(api_key=api_key, url=server)
+        self.step_batcher = StepBatcher(
+            self.client.api.send_steps, max_items=batch_size, interval=batch_interval
+        )
         logger.info("Chainlit data layer initialized")
 
+    async def flush(self):
+        await self.step_batcher.flush()
+
     def attachment_to_element_dict(self, attachment: Attachment) -> "ElementDict":
         metadata = attachment.metadata or {}
         return {
@@ -214,6 +313,7 @@ class ChainlitDataLayer:
             createdAt=_user.created_at or "",
         )
 
+    @invalidate_thread_cache()
     async def upsert_feedback(
         self,
         feedback: Feedback,
@@ -237,7 +337,82 @@ class ChainlitDataLayer:
             )
             return created.id or ""
 
+    async def upload_file_stream(self, path: str, mime: str, thread_id: str) -> Dict:
+        """
+        Upload a file like the Literal client upload_file, streamed from the
+        disk with its Content-Length: chunked bodies are refused by some
+        storages, and the client would read multipart files on the event loop.
+        """
+        api = self.client.api
+        file_name = str(uuid.uuid4())
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                f"{api.url}/api/upload/file",
+                json={
+                    "fileName": file_name,
+                    "contentType": mime,
+                    "threadId": thread_id,
+                },
+                headers=api.headers,
+            )
+            if response.status_code >= 400:
+                logger.error(f"Failed to sign upload url: {response.text}")
+                return {"object_key": None, "url": None}
+            signed = response.json()
+
+        method = "put" if "put" in signed else "post"
+        request_dict = signed.get(method, {})  # type: Dict
+        url = request_dict.get("url")
+        if not url:
+            raise Exception("Invalid server response")
+        fields = request_dict.get("fields", {})  # type: Dict
+        headers = dict(request_dict.get("headers") or {})
+
+        loop = asyncio.get_running_loop()
+        size = await loop.run_in_executor(None, os.path.getsize, path)
+        reader = FileChunkReader(path)
+        if request_dict.get("uploadType", "multipart") == "raw":
+            content = reader.__aiter__()  # type: AsyncIterator[bytes]
+            headers["Content-Length"] = str(size)
+        else:
+            boundary = uuid.uuid4().hex
+            parts = [
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"'
+                f"\r\n\r\n{value}\r\n"
+                for name, value in fields.items()
+            ]
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                f'filename="{file_name}"\r\nContent-Type: {mime}\r\n\r\n'
+            )
+            head = "".join(parts).encode()
+            tail = f"\r\n--{boundary}--\r\n".encode()
+
+            async def multipart_body():
+                yield head
+                async for chunk in reader:
+                    yield chunk
+                yield tail
+
+            content = multipart_body()
+            headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
+            headers["Content-Length"] = str(len(head) + size + len(tail))
+
+        try:
+            async with httpx.AsyncClient() as client:
+                upload_response = await client.request(
+                    method, url, headers=headers, content=content
+                )
+            upload_response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Failed to upload file: {str(e)}")
+            return {"object_key": None, "url": None}
+        finally:
+            reader.close()
+        return {"object_key": fields.get("key"), "url": signed.get("signedUrl")}
+
     @queue_until_user_message()
+    @invalidate_thread_cache()
     async def create_element(self, element: "Element"):
         metadata = {
             "size": element.size,
@@ -254,34 +429,37 @@ class ChainlitDataLayer:
 
         if not element.url:
             if element.path:
-                async with aiofiles.open(element.path, "rb") as f:
-                    content = await f.read()  # type: Union[bytes, str]
+                # Stream the file instead of loading it in memory
+                uploaded = await self.upload_file_stream(
+                    path=element.path,
+                    mime=element.mime or "application/octet-stream",
+                    thread_id=element.thread_id,
+                )
             elif element.content:
-                content = element.content
+                uploaded = await self.client.api.upload_file(
+                    content=element.content,
+                    mime=element.mime,
+                    thread_id=element.thread_id,
+                )
             else:
                 raise ValueError("Either path or content must be provided")
-            uploaded = await self.client.api.upload_file(
-                content=content, mime=element.mime, thread_id=element.thread_id
-            )
             object_key = uploaded["object_key"]
 
-        await self.client.api.send_steps(
-            [
-                {
-                    "id": element.for_id,
-                    "threadId": element.thread_id,
-                    "attachments": [
-                        {
-                            "id": element.id,
-                            "name": element.name,
-                            "metadata": metadata,
-                            "mime": element.mime,
-                            "url": element.url,
-                            "objectKey": object_key,
-                        }
-                    ],
-                }
-            ]
+        await self.step_batcher.add(
+            {
+                "id": element.for_id,
+                "threadId": element.thread_id,
+                "attachments": [
+                    {
+                        "id": element.id,
+                        "name": element.name,
+                        "metadata": metadata,
+                        "mime": element.mime,
+                        "url": element.url,
+                        "objectKey": object_key,
+                    }
+                ],
+            }
         )
 
     async def get_element(
@@ -293,10 +471,12 @@ class ChainlitDataLayer:
         return self.attachment_to_element_dict(attachment)
 
     @queue_until_user_message()
+    @invalidate_thread_cache()
     async def delete_element(self, element_id: str):
         await self.client.api.delete_attachment(id=element_id)
 
     @queue_until_user_message()
+    @invalidate_thread_cache()
     async def create_step(self, step_dict: "StepDict"):
         metadata = {
             "disableFeedback": step_dict.get("disableFeedback"),
@@ -323,25 +503,42 @@ class ChainlitDataLayer:
         if step_dict.get("output"):
             step["output"] = {"content": step_dict.get("output")}
 
-        await self.client.api.send_steps([step])
+        await self.step_batcher.add(step)
 
     @queue_until_user_message()
+    @invalidate_thread_cache()
     async def update_step(self, step_dict: "StepDict"):
         await self.create_step(step_dict)
 
     @queue_until_user_message()
+    @invalidate_thread_cache()
     async def delete_step(self, step_id: str):
+        # Ordered after the batch in flight, which may contain the step
+        await self.step_batcher.discard(step_id)
         await self.client.api.delete_step(id=step_id)
 
+    @cached_thread_author()
     async def get_thread_author(self, thread_id: str) -> str:
-        thread = await self.get_thread(thread_id)
-        if not thread:
-            return ""
-        user = thread.get("user")
-        if not user:
+        # Only fetch the participant, not the steps of the thread
+        result = await self.client.api.make_api_call(
+            "get thread author",
+            """
+            query GetThreadAuthor($id: String!) {
+                threadDetail(id: $id) {
+                    participant {
+                        identifier
+                    }
+                }
+            }
+            """,
+            {"id": thread_id},
+        )
+        thread = result["data"]["threadDetail"]
+        if not thread or not thread.get("participant"):
             return ""
-        return user.get("identifier") or ""
+        return thread["participant"].get("identifier") or ""
 
+    @invalidate_thread_cache(author=True)
     async def delete_thread(self, thread_id: str):
         await self.client.api.delete_thread(id=thread_id)
 
@@ -366,7 +563,10 @@ class ChainlitDataLayer:
             first=pagination.first, after=pagination.cursor, filters=client_filters
         )
 
+    @cached_thread()
     async def get_thread(self, thread_id: str) -> "Optional[ThreadDict]":
+        # Read the steps still waiting in the batch as well
+        await self.step_batcher.flush()
         thread = await self.client.api.get_thread(id=thread_id)
         if not thread:
             return None
@@ -402,6 +602,7 @@ class ChainlitDataLayer:
             "tags": thread.tags,
         }
 
+    @invalidate_thread_cache(author=True)
     async def update_thread(
         self,
         thread_id: str,
@@ -422,6 +623,13 @@ class ChainlitDataLayer:
 if api_key := os.environ.get("LITERAL_API_KEY"):
     server = os.environ.get("LITERAL_SERVER")
     _data_layer = ChainlitDataLayer(api_key=api_key, server=server)
+elif database_url := os.environ.get("CHAINLIT_DATABASE_URL"):
+    # Local database, sqlite:///path/to/file.db
+    if not database_url.startswith("sqlite:///"):
+        raise ValueError(f"Unsupported database: {database_url}")
+    from chainlit.data.sql import SQLiteDataLayer
+
+    _data_layer = SQLiteDataLayer(database_url[len("sqlite:///") :])
 
 
 def get_data_layer():
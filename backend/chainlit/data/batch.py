@@ -0,0 +1,101 @@
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional
+
+from chainlit.logger import logger
+
+
+def merge_step(into: Dict, step: Mapping[str, Any]):
+    """Merge a newer write of a step, its fields win. Attachments are accumulated."""
+    attachments = into.get("attachments", []) + step.get("attachments", [])
+    into.update(step)
+    if attachments:
+        into["attachments"] = attachments
+
+
+class StepBatcher:
+    """
+    Group the steps (and their attachments) sent to the API.
+
+    Steps are sent by batches of `max_items`, or `interval` seconds after the
+    first pending one, whichever comes first. Writes of a step still pending are
+    merged into one, the last write winning, so a streamed message is sent once
+    per batch instead of once per update.
+
+    A batch that still fails after `max_retries` is dropped, and its step ids
+    are logged.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Any]], Awaitable[Any]],
+        max_items=50,
+        interval: float = 0.1,
+        max_retries=3,
+        retry_delay: float = 0.5,
+    ):
+        self.send = send
+        self.max_items = max_items
+        self.interval = interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        # Step id -> merged step, in the order of the first write
+        self._pending = {}  # type: Dict[str, Dict]
+        # Created in the running loop, locks are bound to a loop on 3.8/3.9
+        self._lock = None  # type: Optional[asyncio.Lock]
+        self._timer = None  # type: Optional[asyncio.TimerHandle]
+        self._flush_task = None  # type: Optional[asyncio.Task]
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def add(self, step: Mapping[str, Any]):
+        step_id = step["id"]
+        if pending := self._pending.get(step_id):
+            merge_step(pending, step)
+        else:
+            self._pending[step_id] = dict(step)
+
+        if len(self._pending) >= self.max_items:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.interval, self._flush_later
+            )
+
+    async def discard(self, step_id: str):
+        """
+        Forget the pending writes of a deleted step, and wait for the batch being
+        sent, which may create it again after the delete otherwise.
+        """
+        self._pending.pop(step_id, None)
+        async with self._get_lock():
+            pass
+
+    def _flush_later(self):
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        """Send the pending steps."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        async with self._get_lock():
+            if not self._pending:
+                return
+            steps = list(self._pending.values())
+            self._pending = {}
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self.send(steps)
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        step_ids = ", ".join(str(step.get("id")) for step in steps)
+                        logger.error(f"Failed to send steps {step_ids}: {str(e)}")
+                        return
+                    delay = self.retry_delay * 2**attempt
+                    await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
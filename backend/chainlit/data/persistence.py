@@ -0,0 +1,252 @@
+import asyncio
+import contextvars
+import random
+import sys
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    cast,
+)
+
+from chainlit.context import context_var
+from chainlit.logger import logger
+
+
+@dataclass
+class PersistenceMetrics:
+    enqueued: int = 0
+    coalesced: int = 0
+    processed: int = 0
+    retried: int = 0
+    # Attempts cancelled for running longer than the timeout
+    timeouts: int = 0
+    failed: int = 0
+    # Number of times a producer had to wait for room in the queue
+    waits: int = 0
+    depth: int = 0
+    max_depth: int = 0
+    # Time between the enqueueing of an operation and the end of its write, in seconds
+    last_latency: float = 0
+    max_latency: float = 0
+    total_latency: float = 0
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.processed if self.processed else 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {**asdict(self), "average_latency": self.average_latency}
+
+
+class Operation:
+    __slots__ = ("name", "key", "fn", "args", "context", "enqueued_at")
+
+    def __init__(self, name: str, fn: Callable[..., Awaitable[Any]], args: tuple):
+        self.name = name
+        # Key under which the operation can be coalesced
+        self.key = None  # type: Optional[str]
+        self.fn = fn
+        self.args = args
+        # Run the write in the context of the caller (session, current step...)
+        self.context = contextvars.copy_context()
+        self.enqueued_at = time.monotonic()
+
+
+class PersistenceQueue:
+    """
+    Write-behind queue of the data layer calls.
+
+    The writes of a session are made in order, so a step is never updated
+    before being created, but the sessions are written in parallel by a bounded
+    pool of workers: a slow write only delays the writes of its session. The
+    queue of a session is bounded: when it is full the producers of the session
+    wait, instead of piling up tasks while the data layer is slow.
+    A pending update of a step is replaced by a newer update of the same step.
+    Failed writes, and writes longer than the timeout, are retried with an
+    exponential backoff and jitter.
+    """
+
+    def __init__(
+        self,
+        max_size=1000,
+        max_workers=8,
+        max_retries=3,
+        retry_delay: float = 0.5,
+        timeout: float = 60,
+    ):
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+        self.metrics = PersistenceMetrics()
+        # Pending operations of each session, in order
+        self._lanes = {}  # type: Dict[str, Deque[Operation]]
+        # Sessions with pending operations and no worker writing them
+        self._ready = deque()  # type: Deque[str]
+        # Sessions ready or being written
+        self._scheduled = set()  # type: Set[str]
+        self._size = 0
+        # Pending operations that a newer one can replace, by key
+        self._coalescable = {}  # type: Dict[str, Operation]
+        # Events are bound to the loop on 3.8/3.9, create them in the worker's
+        self._not_full = {}  # type: Dict[str, asyncio.Event]
+        self._not_empty = None  # type: Optional[asyncio.Event]
+        self._idle = None  # type: Optional[asyncio.Event]
+        self._workers = []  # type: List[asyncio.Task]
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def _session_key() -> str:
+        context = context_var.get(None)
+        return context.session.id if context else ""
+
+    async def put(
+        self,
+        name: str,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        key: Optional[str] = None,
+        coalesce=False,
+    ):
+        """
+        Queue a write. If coalesce is set, a pending write with the same key (made
+        with coalesce as well) is replaced instead, keeping its place in the queue.
+        """
+        self._ensure_workers()
+        operation = Operation(name, fn, args)
+
+        if coalesce and key is not None:
+            if pending := self._coalescable.get(key):
+                pending.args = operation.args
+                pending.context = operation.context
+                self.metrics.coalesced += 1
+                return
+
+        session_key = self._session_key()
+        while len(self._lanes.get(session_key, ())) >= self.max_size:
+            self.metrics.waits += 1
+            not_full = self._not_full.setdefault(session_key, asyncio.Event())
+            not_full.clear()
+            await not_full.wait()
+
+        self._lanes.setdefault(session_key, deque()).append(operation)
+        if key is not None:
+            if coalesce:
+                operation.key = key
+                self._coalescable[key] = operation
+            else:
+                # A later update must not move before this write
+                self._coalescable.pop(key, None)
+        self._size += 1
+        self.metrics.enqueued += 1
+        self.metrics.depth = self._size
+        self.metrics.max_depth = max(self.metrics.max_depth, self.metrics.depth)
+        if session_key not in self._scheduled:
+            assert self._not_empty is not None and self._idle is not None
+            self._scheduled.add(session_key)
+            self._ready.append(session_key)
+            self._idle.clear()
+            self._not_empty.set()
+
+    def _ensure_workers(self):
+        if self._not_empty is None or self._idle is None:
+            self._not_empty = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._run()))
+
+    async def _run(self):
+        assert self._not_empty is not None and self._idle is not None
+        while True:
+            if not self._ready:
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            # Write one operation of the session, then let the other sessions go
+            session_key = self._ready.popleft()
+            lane = self._lanes[session_key]
+            operation = lane.popleft()
+            if self._coalescable.get(operation.key) is operation:
+                del self._coalescable[operation.key]
+            self._size -= 1
+            self.metrics.depth = self._size
+            if not_full := self._not_full.get(session_key):
+                not_full.set()
+
+            try:
+                await self._execute(operation)
+            finally:
+                if lane:
+                    self._ready.append(session_key)
+                    self._not_empty.set()
+                else:
+                    del self._lanes[session_key]
+                    self._not_full.pop(session_key, None)
+                    self._scheduled.discard(session_key)
+                    if not self._scheduled:
+                        self._idle.set()
+
+    async def _execute(self, operation: Operation):
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Tasks copy the current context, create it from the caller's one
+                coro = cast(Coroutine[Any, Any, Any], operation.fn(*operation.args))
+                task: asyncio.Task
+                if sys.version_info >= (3, 11):
+                    task = asyncio.create_task(coro, context=operation.context)
+                else:
+                    task = operation.context.run(asyncio.create_task, coro)
+                await asyncio.wait_for(task, self.timeout)
+                break
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.metrics.timeouts += 1
+                    e = Exception(f"timed out after {self.timeout}s")
+                if attempt == self.max_retries:
+                    self.metrics.failed += 1
+                    logger.error(f"Failed to persist {operation.name}: {str(e)}")
+                    return
+                self.metrics.retried += 1
+                delay = self.retry_delay * 2**attempt
+                await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+        latency = time.monotonic() - operation.enqueued_at
+        self.metrics.processed += 1
+        self.metrics.last_latency = latency
+        self.metrics.max_latency = max(self.metrics.max_latency, latency)
+        self.metrics.total_latency += latency
+
+    async def join(self, timeout: Optional[float] = None):
+        """Wait until all the queued writes are done."""
+        if self._idle is None:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._size} data layer writes were not persisted")
+
+
+_persistence_queue = None  # type: Optional[PersistenceQueue]
+
+
+def get_persistence_queue() -> PersistenceQueue:
+    global _persistence_queue
+    if _persistence_queue is None:
+        _persistence_queue = PersistenceQueue()
+    return _persistence_queue
@@ -0,0 +1,628 @@
+import json
+import sqlite3
+import threading
+import uuid
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from chainlit.clock import utc_now
+from chainlit.config import config
+from chainlit.data import (
+    BaseDataLayer,
+    paginate_thread_steps,
+    queue_until_user_message,
+)
+from chainlit.data.batch import StepBatcher
+from chainlit.data.thread_cache import (
+    cached_thread,
+    cached_thread_author,
+    get_thread_cache,
+    invalidate_thread_cache,
+)
+from chainlit.logger import logger
+from chainlit.sync import make_async
+from chainlit.types import (
+    Feedback,
+    PagedThreadDict,
+    Pagination,
+    ThreadDict,
+    ThreadFilter,
+    ThreadPageDict,
+)
+from chainlit.user import PersistedUser, User, UserDict
+from literalai import PageInfo, PaginatedResponse
+
+if TYPE_CHECKING:
+    from chainlit.element import Element, ElementDict
+    from chainlit.step import FeedbackDict, StepDict
+
+T = TypeVar("T")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        identifier TEXT NOT NULL UNIQUE,
+        metadata TEXT NOT NULL DEFAULT '{}',
+        created_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS threads (
+        id TEXT PRIMARY KEY,
+        created_at TEXT NOT NULL,
+        name TEXT,
+        user_id TEXT REFERENCES users(id),
+        tags TEXT,
+        metadata TEXT
+    )
+    """,
+    # Keyset pagination of the threads of a user
+    "CREATE INDEX IF NOT EXISTS idx_threads_user ON threads(user_id, created_at, id)",
+    """
+    CREATE TABLE IF NOT EXISTS steps (
+        id TEXT PRIMARY KEY,
+        thread_id TEXT NOT NULL,
+        parent_id TEXT,
+        created_at TEXT,
+        data TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_steps_thread ON steps(thread_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS idx_steps_parent ON steps(parent_id)",
+    """
+    CREATE TABLE IF NOT EXISTS elements (
+        id TEXT PRIMARY KEY,
+        thread_id TEXT,
+        for_id TEXT,
+        data TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_elements_thread ON elements(thread_id)",
+    """
+    CREATE TABLE IF NOT EXISTS feedbacks (
+        id TEXT PRIMARY KEY,
+        for_id TEXT NOT NULL UNIQUE,
+        value INTEGER NOT NULL,
+        strategy TEXT NOT NULL,
+        comment TEXT
+    )
+    """,
+]
+
+# Fields of a step dict stored in the indexed columns or in the feedbacks table
+STEP_COLUMNS_FIELDS = ("id", "threadId", "parentId", "createdAt", "feedback")
+
+UPSERT_STEP_SQL = """
+INSERT INTO steps (id, thread_id, parent_id, created_at, data) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    thread_id = excluded.thread_id,
+    parent_id = excluded.parent_id,
+    created_at = COALESCE(steps.created_at, excluded.created_at),
+    data = excluded.data
+"""
+ENSURE_THREAD_SQL = "INSERT OR IGNORE INTO threads (id, created_at) VALUES (?, ?)"
+
+
+class SQLiteDataLayer(BaseDataLayer):
+    """
+    Data layer storing the users, threads, steps, elements and feedbacks in a
+    local SQLite database.
+
+    Step writes go through a StepBatcher and are inserted by batches, in a single
+    transaction. Threads are listed with keyset pagination, the cursor being the
+    id of the last thread of the previous page. Element files are not copied:
+    only the elements with an url can be displayed again after the session.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, batch_interval: float = 0.05):
+        self.path = path
+        self._local = threading.local()
+        self.step_batcher = StepBatcher(
+            self._write_steps, max_items=batch_size, interval=batch_interval
+        )
+        with self._connection() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        logger.info(f"SQLite data layer initialized ({path})")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per worker thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _run_sync(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        conn = self._connection()
+        with conn:
+            return fn(conn)
+
+    async def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn in a worker thread, inside a transaction."""
+        return await make_async(self._run_sync)(fn)
+
+    async def flush(self):
+        await self.step_batcher.flush()
+
+    async def _write_steps(self, steps: List[Dict]):
+        now = utc_now()
+        rows = []
+        for step in steps:
+            if not step.get("threadId"):
+                # Would fail the whole batch on the NOT NULL constraint
+                logger.warning(f"Not persisting step {step.get('id')} without thread")
+                continue
+            data = {k: v for k, v in step.items() if k not in STEP_COLUMNS_FIELDS}
+            rows.append(
+                (
+                    step["id"],
+                    step.get("threadId"),
+                    step.get("parentId"),
+                    step.get("createdAt"),
+                    json.dumps(data, ensure_ascii=False),
+                )
+            )
+        thread_ids = {(row[1], now) for row in rows}
+
+        def write(conn: sqlite3.Connection):
+            conn.executemany(ENSURE_THREAD_SQL, thread_ids)
+            try:
+                conn.executemany(UPSERT_STEP_SQL, rows)
+            except sqlite3.IntegrityError:
+                # Write the steps one by one to only lose the invalid ones
+                for row in rows:
+                    try:
+                        conn.execute(UPSERT_STEP_SQL, row)
+                    except sqlite3.IntegrityError as e:
+                        logger.error(f"Failed to persist step {row[0]}: {e}")
+
+        await self._run(write)
+
+    def _user_from_row(self, row: sqlite3.Row) -> PersistedUser:
+        return PersistedUser(
+            id=row["id"],
+            identifier=row["identifier"],
+            metadata=json.loads(row["metadata"]),
+            createdAt=row["created_at"],
+        )
+
+    async def get_user(self, identifier: str) -> Optional[PersistedUser]:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT * FROM users WHERE identifier = ?", (identifier,)
+            ).fetchone()
+        )
+        return self._user_from_row(row) if row else None
+
+    async def create_user(self, user: User) -> Optional[PersistedUser]:
+        def upsert(conn: sqlite3.Connection):
+            conn.execute(
+                """
+                INSERT INTO users (id, identifier, metadata, created_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(identifier) DO UPDATE SET metadata = excluded.metadata
+                """,
+                (
+                    str(uuid.uuid4()),
+                    user.identifier,
+                    json.dumps(user.metadata),
+                    utc_now(),
+                ),
+            )
+            return conn.execute(
+                "SELECT * FROM users WHERE identifier = ?", (user.identifier,)
+            ).fetchone()
+
+        return self._user_from_row(await self._run(upsert))
+
+    @invalidate_thread_cache()
+    async def upsert_feedback(self, feedback: Feedback) -> str:
+        feedback_id = feedback.id or str(uuid.uuid4())
+
+        def upsert(conn: sqlite3.Connection):
+            conn.execute(
+                """
+                INSERT INTO feedbacks (id, for_id, value, strategy, comment) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(for_id) DO UPDATE SET
+                    value = excluded.value,
+                    strategy = excluded.strategy,
+                    comment = excluded.comment
+                """,
+                (
+                    feedback_id,
+                    feedback.forId,
+                    feedback.value,
+                    feedback.strategy,
+                    feedback.comment,
+                ),
+            )
+            return conn.execute(
+                "SELECT id FROM feedbacks WHERE for_id = ?", (feedback.forId,)
+            ).fetchone()["id"]
+
+        return await self._run(upsert)
+
+    @queue_until_user_message()
+    @invalidate_thread_cache()
+    async def create_element(self, element: "Element"):
+        if not element.for_id:
+            return
+        element_dict = element.to_dict()
+        # The files of the session are deleted when it ends
+        element_dict["chainlitKey"] = None
+        await self._run(
+            lambda conn: conn.execute(
+                "INSERT OR REPLACE INTO elements (id, thread_id, for_id, data) VALUES (?, ?, ?, ?)",
+                (
+                    element.id,
+                    element.thread_id,
+                    element.for_id,
+                    json.dumps(element_dict, ensure_ascii=False),
+                ),
+            )
+        )
+
+    async def get_element(
+        self, thread_id: str, element_id: str
+    ) -> Optional["ElementDict"]:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT data FROM elements WHERE id = ? AND thread_id = ?",
+                (element_id, thread_id),
+            ).fetchone()
+        )
+        return json.loads(row["data"]) if row else None
+
+    @queue_until_user_message()
+    @invalidate_thread_cache()
+    async def delete_element(self, element_id: str):
+        await self._run(
+            lambda conn: conn.execute(
+                "DELETE FROM elements WHERE id = ?", (element_id,)
+            )
+        )
+
+    @queue_until_user_message()
+    @invalidate_thread_cache()
+    async def create_step(self, step_dict: "StepDict"):
+        await self.step_batcher.add(dict(step_dict))
+
+    @queue_until_user_message()
+    @invalidate_thread_cache()
+    async def update_step(self, step_dict: "StepDict"):
+        await self.step_batcher.add(dict(step_dict))
+
+    @queue_until_user_message()
+    @invalidate_thread_cache()
+    async def delete_step(self, step_id: str):
+        await self.step_batcher.discard(step_id)
+
+        def delete(conn: sqlite3.Connection):
+            conn.execute("DELETE FROM steps WHERE id = ?", (step_id,))
+            conn.execute("DELETE FROM feedbacks WHERE for_id = ?", (step_id,))
+            conn.execute("DELETE FROM elements WHERE for_id = ?", (step_id,))
+
+        await self._run(delete)
+
+    @cached_thread_author()
+    async def get_thread_author(self, thread_id: str) -> str:
+        row = await self._run(
+            lambda conn: conn.execute(
+                """
+                SELECT u.identifier FROM threads t JOIN users u ON u.id = t.user_id
+                WHERE t.id = ?
+                """,
+                (thread_id,),
+            ).fetchone()
+        )
+        return row["identifier"] if row else ""
+
+    @invalidate_thread_cache(author=True)
+    async def delete_thread(self, thread_id: str):
+        def delete(conn: sqlite3.Connection):
+            conn.execute(
+                "DELETE FROM feedbacks WHERE for_id IN (SELECT id FROM steps WHERE thread_id = ?)",
+                (thread_id,),
+            )
+            conn.execute("DELETE FROM elements WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM steps WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM threads WHERE id = ?", (thread_id,))
+
+        await self._run(delete)
+
+    def _thread_from_row(
+        self,
+        row: sqlite3.Row,
+        steps: List["StepDict"],
+        elements: Optional[List["ElementDict"]],
+    ) -> ThreadDict:
+        user = None  # type: Optional[UserDict]
+        if row["user_id"]:
+            user = {
+                "id": row["user_id"],
+                "identifier": row["user_identifier"] or "",
+                "metadata": json.loads(row["user_metadata"] or "{}"),
+            }
+        return {
+            "id": row["id"],
+            "createdAt": row["created_at"],
+            "name": row["name"],
+            "user": user,
+            "tags": json.loads(row["tags"]) if row["tags"] else None,
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else None,
+            "steps": steps,
+            "elements": elements,
+        }
+
+    async def list_threads(
+        self, pagination: Pagination, filters: ThreadFilter
+    ) -> PaginatedResponse[ThreadDict]:
+        if not filters.userIdentifier:
+            raise ValueError("userIdentifier is required")
+        await self.step_batcher.flush()
+
+        conditions = ["u.identifier = ?"]
+        params = [filters.userIdentifier]  # type: List[Any]
+        if pagination.cursor:
+            conditions.append(
+                "(t.created_at, t.id) < (SELECT created_at, id FROM threads WHERE id = ?)"
+            )
+            params.append(pagination.cursor)
+        if filters.search:
+            conditions.append("t.name LIKE ?")
+            params.append(f"%{filters.search}%")
+        if filters.feedback is not None:
+            conditions.append(
+                """
+                EXISTS (
+                    SELECT 1 FROM steps s JOIN feedbacks f ON f.for_id = s.id
+                    WHERE s.thread_id = t.id AND f.value = ?
+                )
+                """
+            )
+            params.append(filters.feedback)
+        # Fetch one more row to know if there is a next page
+        params.append(pagination.first + 1)
+
+        rows = await self._run(
+            lambda conn: conn.execute(
+                f"""
+                SELECT t.*, u.identifier AS user_identifier, u.metadata AS user_metadata
+                FROM threads t JOIN users u ON u.id = t.user_id
+                WHERE {" AND ".join(conditions)}
+                ORDER BY t.created_at DESC, t.id DESC
+                LIMIT ?
+                """,
+                params,
+            ).fetchall()
+        )
+        has_next_page = len(rows) > pagination.first
+        rows = rows[: pagination.first]
+        return PaginatedResponse(
+            data=[self._thread_from_row(row, [], None) for row in rows],
+            pageInfo=PageInfo(
+                hasNextPage=has_next_page,
+                endCursor=rows[-1]["id"] if rows else None,
+            ),
+        )
+
+    def _steps_from_rows(self, rows: List[sqlite3.Row]) -> List["StepDict"]:
+        steps = []  # type: List[StepDict]
+        for row in rows:
+            if config.ui.hide_cot and row["parent_id"]:
+                continue
+            step = json.loads(row["data"])
+            step["id"] = row["id"]
+            step["threadId"] = row["thread_id"]
+            step["parentId"] = row["parent_id"]
+            step["createdAt"] = row["created_at"]
+            feedback = None  # type: Optional[FeedbackDict]
+            if row["feedback_id"]:
+                feedback = {
+                    "id": row["feedback_id"],
+                    "forId": row["id"],
+                    "value": row["value"],
+                    "strategy": row["strategy"],
+                    "comment": row["comment"],
+                }  # type: ignore
+            step["feedback"] = feedback
+            if not config.features.prompt_playground:
+                step.pop("generation", None)
+            steps.append(step)
+        return steps
+
+    @cached_thread()
+    async def get_thread(self, thread_id: str) -> Optional[ThreadDict]:
+        await self.step_batcher.flush()
+
+        def read(conn: sqlite3.Connection):
+            thread = conn.execute(
+                """
+                SELECT t.*, u.identifier AS user_identifier, u.metadata AS user_metadata
+                FROM threads t LEFT JOIN users u ON u.id = t.user_id
+                WHERE t.id = ?
+                """,
+                (thread_id,),
+            ).fetchone()
+            if not thread:
+                return None, [], []
+            steps = conn.execute(
+                """
+                SELECT s.id, s.thread_id, s.parent_id, s.created_at, s.data,
+                    f.id AS feedback_id, f.value, f.strategy, f.comment
+                FROM steps s LEFT JOIN feedbacks f ON f.for_id = s.id
+                WHERE s.thread_id = ?
+                ORDER BY s.created_at, s.id
+                """,
+                (thread_id,),
+            ).fetchall()
+            elements = conn.execute(
+                "SELECT data FROM elements WHERE thread_id = ?", (thread_id,)
+            ).fetchall()
+            return thread, steps, elements
+
+        thread, step_rows, element_rows = await self._run(read)
+        if not thread:
+            return None
+
+        steps = self._steps_from_rows(step_rows)
+        elements = [json.loads(row["data"]) for row in element_rows]
+        return self._thread_from_row(thread, steps, elements)
+
+    def _read_steps_page(
+        self, conn: sqlite3.Connection, thread_id: str, pagination: Pagination
+    ) -> Tuple[bool, List[sqlite3.Row], List[sqlite3.Row]]:
+        # Steps whose parent is not in the thread are roots, as in
+        # paginate_thread_steps
+        conditions = [
+            "thread_id = ?",
+            """(parent_id IS NULL
+                OR parent_id NOT IN (SELECT id FROM steps WHERE thread_id = ?))""",
+        ]
+        params = [thread_id, thread_id]  # type: List[Any]
+        if pagination.cursor:
+            conditions.append(
+                "(created_at, id) < (SELECT created_at, id FROM steps WHERE id = ?)"
+            )
+            params.append(pagination.cursor)
+        limit = ""
+        if pagination.first > 0:
+            # Fetch one more root step to know if there is a next page
+            limit = "LIMIT ?"
+            params.append(pagination.first + 1)
+        roots = conn.execute(
+            f"""
+            SELECT id FROM steps WHERE {" AND ".join(conditions)}
+            ORDER BY created_at DESC, id DESC {limit}
+            """,
+            params,
+        ).fetchall()
+        has_next_page = 0 < pagination.first < len(roots)
+        root_ids = json.dumps([row["id"] for row in roots[: pagination.first or None]])
+        descendants = (
+            ""
+            if config.ui.hide_cot
+            else "UNION ALL SELECT s.id FROM steps s JOIN page ON s.parent_id = page.id"
+        )
+        steps = conn.execute(
+            f"""
+            WITH RECURSIVE page(id) AS (
+                SELECT value FROM json_each(?) {descendants}
+            )
+            SELECT s.id, s.thread_id, s.parent_id, s.created_at, s.data,
+                f.id AS feedback_id, f.value, f.strategy, f.comment
+            FROM page JOIN steps s ON s.id = page.id
+            LEFT JOIN feedbacks f ON f.for_id = s.id
+            ORDER BY s.created_at, s.id
+            """,
+            (root_ids,),
+        ).fetchall()
+        elements = conn.execute(
+            """
+            SELECT data FROM elements
+            WHERE thread_id = ? AND for_id IN (SELECT value FROM json_each(?))
+            """,
+            (thread_id, json.dumps([row["id"] for row in steps])),
+        ).fetchall()
+        return has_next_page, steps, elements
+
+    def _steps_page(
+        self,
+        has_next_page: bool,
+        step_rows: List[sqlite3.Row],
+        element_rows: List[sqlite3.Row],
+    ) -> ThreadPageDict:
+        steps = self._steps_from_rows(step_rows)
+        step_ids = {step["id"] for step in steps}
+        roots = [step["id"] for step in steps if step.get("parentId") not in step_ids]
+        return {
+            "steps": steps,
+            "elements": [json.loads(row["data"]) for row in element_rows],
+            "pageInfo": {
+                "hasNextPage": has_next_page,
+                "endCursor": roots[0] if roots else None,
+            },
+        }
+
+    async def get_thread_steps(
+        self, thread_id: str, pagination: Pagination
+    ) -> Optional[ThreadPageDict]:
+        if (thread := get_thread_cache().get(thread_id)) is not None:
+            return paginate_thread_steps(thread, pagination)
+        await self.step_batcher.flush()
+
+        def read(conn: sqlite3.Connection):
+            if not conn.execute(
+                "SELECT 1 FROM threads WHERE id = ?", (thread_id,)
+            ).fetchone():
+                return None
+            return self._read_steps_page(conn, thread_id, pagination)
+
+        result = await self._run(read)
+        if result is None:
+            return None
+        return self._steps_page(*result)
+
+    async def get_thread_page(
+        self, thread_id: str, pagination: Pagination
+    ) -> Optional[PagedThreadDict]:
+        if get_thread_cache().get(thread_id) is not None:
+            return await super().get_thread_page(thread_id, pagination)
+        await self.step_batcher.flush()
+
+        def read(conn: sqlite3.Connection):
+            thread = conn.execute(
+                """
+                SELECT t.*, u.identifier AS user_identifier, u.metadata AS user_metadata
+                FROM threads t LEFT JOIN users u ON u.id = t.user_id
+                WHERE t.id = ?
+                """,
+                (thread_id,),
+            ).fetchone()
+            if not thread:
+                return None
+            return thread, self._read_steps_page(conn, thread_id, pagination)
+
+        result = await self._run(read)
+        if result is None:
+            return None
+        row, page_rows = result
+        page = self._steps_page(*page_rows)
+        thread = self._thread_from_row(row, page["steps"], page["elements"])
+        return {**thread, "pageInfo": page["pageInfo"]}
+
+    @invalidate_thread_cache(author=True)
+    async def update_thread(
+        self,
+        thread_id: str,
+        name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        tags: Optional[List[str]] = None,
+    ):
+        await self._run(
+            lambda conn: conn.execute(
+                """
+                INSERT INTO threads (id, created_at, name, user_id, tags, metadata)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    name = COALESCE(excluded.name, name),
+                    user_id = COALESCE(excluded.user_id, user_id),
+                    tags = COALESCE(excluded.tags, tags),
+                    metadata = COALESCE(excluded.metadata, metadata)
+                """,
+                (
+                    thread_id,
+                    utc_now(),
+                    name,
+                    user_id,
+                    json.dumps(tags) if tags is not None else None,
+                    json.dumps(metadata, ensure_ascii=False)
+                    if metadata is not None
+                    else None,
+                ),
+            )
+        )
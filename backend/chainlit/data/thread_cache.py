@@ -0,0 +1,193 @@
+import copy
+import functools
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from chainlit.types import ThreadDict
+
+
+def get_written_id(value: Any) -> Optional[str]:
+    """Id of the thread, step, element or feedback target written by a data layer call."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return value.get("threadId") or value.get("id")
+    return (
+        getattr(value, "thread_id", None)
+        or getattr(value, "forId", None)
+        or getattr(value, "id", None)
+    )
+
+
+class ThreadCache:
+    """
+    LRU cache of the threads read from the data layer, so resuming a thread and
+    reloading it from the history do not fetch and convert all its steps again.
+
+    Entries expire after `ttl` seconds and are dropped when a write touches the
+    thread, one of its steps or one of its elements. The cache is local to the
+    process: writes made by another worker are only seen once the entry expires.
+    The threads returned to the callers are copies, they may mutate them.
+    """
+
+    def __init__(self, max_size=128, ttl: float = 60):
+        self.max_size = max_size
+        self.ttl = ttl
+        # Thread id -> (expiry, thread)
+        self._threads: "OrderedDict[str, Tuple[float, ThreadDict]]" = OrderedDict()
+        # Thread id -> (expiry, author identifier)
+        self._authors = OrderedDict()  # type: OrderedDict[str, Tuple[float, str]]
+        # Step and element ids of the cached threads -> thread id
+        self._owners = {}  # type: Dict[str, str]
+        # Generation of the last invalidation of each thread, or of each step or
+        # element whose thread is not cached, to not store a thread read while
+        # it was being written
+        self._generation = 0
+        self._invalidated = OrderedDict()  # type: OrderedDict[str, int]
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+
+    def begin_read(self) -> int:
+        """Token to pass to put() once the thread is read."""
+        return self._generation
+
+    def get(self, thread_id: str) -> Optional["ThreadDict"]:
+        entry = self._threads.get(thread_id)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(thread_id)
+            self.misses += 1
+            return None
+        self._threads.move_to_end(thread_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, thread_id: str, thread: "ThreadDict", token: int):
+        items = (thread.get("steps") or []) + (thread.get("elements") or [])
+        item_ids = [item_id for item in items if (item_id := item.get("id"))]
+        if (
+            token < self._floor
+            or self._invalidated.get(thread_id, 0) > token
+            or any(self._invalidated.get(item_id, 0) > token for item_id in item_ids)
+        ):
+            # Written since the read started
+            return
+        self._drop(thread_id)
+        self._threads[thread_id] = (time.monotonic() + self.ttl, thread)
+        for item_id in item_ids:
+            self._owners[item_id] = thread_id
+        if user := thread.get("user"):
+            self.put_author(thread_id, user.get("identifier") or "")
+        while len(self._threads) > self.max_size:
+            self._drop(next(iter(self._threads)))
+
+    def get_author(self, thread_id: str) -> Optional[str]:
+        entry = self._authors.get(thread_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        self._authors.move_to_end(thread_id)
+        return entry[1]
+
+    def put_author(self, thread_id: str, author: str):
+        self._authors[thread_id] = (time.monotonic() + self.ttl, author)
+        self._authors.move_to_end(thread_id)
+        while len(self._authors) > self.max_size * 4:
+            self._authors.popitem(last=False)
+
+    def _drop(self, thread_id: str):
+        entry = self._threads.pop(thread_id, None)
+        if entry is None:
+            return
+        thread = entry[1]
+        for item in (thread.get("steps") or []) + (thread.get("elements") or []):
+            if (item_id := item.get("id")) and self._owners.get(item_id) == thread_id:
+                del self._owners[item_id]
+
+    def invalidate(self, written_id: Optional[str], author=False):
+        """Drop the thread of a written thread, step or element id."""
+        if not written_id:
+            return
+        # A step or element of a thread that is not cached stays under its own
+        # id, put() checks the ids of the steps and elements of the thread
+        thread_id = self._owners.get(written_id, written_id)
+        self._generation += 1
+        self._invalidated[thread_id] = self._generation
+        self._invalidated.move_to_end(thread_id)
+        while len(self._invalidated) > self.max_size * 4:
+            _, generation = self._invalidated.popitem(last=False)
+            self._floor = max(self._floor, generation)
+        self._drop(thread_id)
+        if author:
+            self._authors.pop(thread_id, None)
+
+    def clear(self):
+        self._threads.clear()
+        self._authors.clear()
+        self._owners.clear()
+
+
+_thread_cache = ThreadCache()
+
+
+def get_thread_cache() -> ThreadCache:
+    return _thread_cache
+
+
+def cached_thread():
+    """Serve get_thread from the thread cache."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, thread_id: str):
+            if (thread := _thread_cache.get(thread_id)) is not None:
+                return copy.deepcopy(thread)
+            token = _thread_cache.begin_read()
+            thread = await method(self, thread_id)
+            if thread is not None:
+                _thread_cache.put(thread_id, copy.deepcopy(thread), token)
+            return thread
+
+        return wrapper
+
+    return decorator
+
+
+def cached_thread_author():
+    """Serve get_thread_author from the thread cache."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, thread_id: str):
+            if (author := _thread_cache.get_author(thread_id)) is not None:
+                return author
+            author = await method(self, thread_id)
+            if author:
+                _thread_cache.put_author(thread_id, author)
+            return author
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_thread_cache(author=False):
+    """Drop the cached thread written by the method, identified by its first argument."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            target = args[0] if args else next(iter(kwargs.values()), None)
+            written_id = get_written_id(target)
+            # Before the write, so a concurrent read does not cache the old state
+            _thread_cache.invalidate(written_id, author)
+            try:
+                return await method(self, *args, **kwargs)
+            finally:
+                _thread_cache.invalidate(written_id, author)
+
+        return wrapper
+
+    return decorator
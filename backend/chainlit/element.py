@@ -1,13 +1,30 @@
+import hashlib
 import json
+import os
+import threading
 import uuid
+from collections import OrderedDict
 from enum import Enum
 from io import BytesIO
-from typing import Any, ClassVar, List, Literal, Optional, TypedDict, TypeVar, Union
+from typing import (
+    Any,
+    ClassVar,
+    Hashable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    TypedDict,
+    TypeVar,
+    Union,
+)
 
 import filetype
 from chainlit.context import context
 from chainlit.data import get_data_layer
+from chainlit.data.persistence import get_persistence_queue
 from chainlit.logger import logger
+from chainlit.sync import make_async
 from chainlit.telemetry import trace_event
 from chainlit.types import FileDict
 from pydantic.dataclasses import Field, dataclass
@@ -19,6 +36,70 @@ mime_types = {
     "plotly": "application/json",
 }
 
+# Number of bytes filetype reads to guess a mime type
+MIME_SIGNATURE_SIZE = 8192
+MIME_CACHE_MAX_SIZE = 1024
+# (path, inode, size, mtime) or hash of the signature bytes -> guessed mime
+_mime_cache = OrderedDict()  # type: OrderedDict[Hashable, Optional[str]]
+_mime_cache_lock = threading.Lock()
+
+
+def get_mime_key(
+    path: Optional[str], content: Optional[Union[bytes, str]]
+) -> Optional[Hashable]:
+    """Key of the mime guessed for a path or a content, None if it is not cached."""
+    if path:
+        stat = os.stat(path)
+        return (os.path.abspath(path), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if isinstance(content, (bytes, bytearray)):
+        # The guess only depends on the first bytes of the content
+        signature = memoryview(content)[:MIME_SIGNATURE_SIZE]
+        return hashlib.blake2b(signature, digest_size=16).digest()
+    return None
+
+
+def guess_mime(
+    path: Optional[str], content: Optional[Union[bytes, str]]
+) -> Optional[str]:
+    """Guess the mime type of a file or content from its signature, with a cache."""
+    key = get_mime_key(path, content)
+    if key is None:
+        return filetype.guess_mime(path or content)
+    with _mime_cache_lock:
+        if key in _mime_cache:
+            _mime_cache.move_to_end(key)
+            return _mime_cache[key]
+    mime = filetype.guess_mime(path or content)
+    with _mime_cache_lock:
+        _mime_cache[key] = mime
+        while len(_mime_cache) > MIME_CACHE_MAX_SIZE:
+            _mime_cache.popitem(last=False)
+    return mime
+
+
+async def guess_elements_mime(elements: Sequence["Element"]):
+    """
+    Guess the mime types of elements sent together, in a single worker thread so
+    reading the files does not block the event loop.
+    """
+    pending = [
+        element
+        for element in elements
+        if not element.mime
+        and element.type not in mime_types
+        and (element.path or element.content)
+        and not (element.persisted and not element.updatable)
+    ]
+    if not pending:
+        return
+
+    def guess_all():
+        return [guess_mime(element.path, element.content) for element in pending]
+
+    for element, mime in zip(pending, await make_async(guess_all)()):
+        element.mime = mime
+
+
 ElementType = Literal[
     "image", "avatar", "text", "pdf", "tasklist", "audio", "video", "file", "plotly"
 ]
@@ -127,7 +208,9 @@ class Element:
             return True
         if data_layer := get_data_layer():
             try:
-                asyncio.create_task(data_layer.create_element(self))
+                await get_persistence_queue().put(
+                    "element creation", data_layer.create_element, self
+                )
             except Exception as e:
                 logger.error(f"Failed to create element: {str(e)}")
         if not self.chainlit_key or self.updatable:
@@ -161,7 +244,7 @@ class Element:
             self.mime = (
                 mime_types[self.type]
                 if self.type in mime_types
-                else filetype.guess_mime(self.path or self.content)
+                else guess_mime(self.path, self.content)
             )
 
         await self._create()
@@ -1,8 +1,9 @@
 import asyncio
 import uuid
-from datetime import datetime
-from typing import Any, Dict, List, Literal, Optional, Union, cast
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union, cast
 
+from chainlit.clock import utc_now
+from chainlit.config import config
 from chainlit.data import get_data_layer
 from chainlit.element import Element, File
 from chainlit.logger import logger
@@ -114,6 +115,80 @@ class BaseChainlitEmitter:
         pass
 
 
+class TokenCoalescer:
+    """
+    Batch the streamed tokens of a websocket session.
+
+    Instead of one stream_token event per token, the tokens of each message are
+    joined and sent once per `interval` seconds, or as soon as `max_size`
+    characters are pending. Pending tokens are flushed before any other event is
+    emitted, so the client always receives them before the update of the message.
+    """
+
+    def __init__(self, session: WebsocketSession, interval: float, max_size: int):
+        self.session = session
+        self.interval = interval
+        self.max_size = max_size
+        # Message id -> (tokens, whether the first token replaces the content)
+        self._pending = {}  # type: Dict[str, Tuple[List[str], bool]]
+        self._size = 0
+        self._lock = asyncio.Lock()
+        self._timer = None  # type: Optional[asyncio.TimerHandle]
+        self._flush_task = None  # type: Optional[asyncio.Task]
+
+    async def add(self, id: str, token: str, is_sequence=False):
+        if self.interval <= 0:
+            await self.flush()
+            await self.session.emit(
+                "stream_token", {"id": id, "token": token, "isSequence": is_sequence}
+            )
+            return
+
+        pending = self._pending.get(id)
+        if is_sequence or pending is None:
+            # A sequence token replaces the whole content, previous deltas are obsolete
+            if pending is not None:
+                self._size -= sum(len(t) for t in pending[0])
+            self._pending[id] = ([token], is_sequence)
+        else:
+            pending[0].append(token)
+        self._size += len(token)
+
+        if self._size >= self.max_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.interval, self._flush_later
+            )
+
+    def _flush_later(self):
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush())
+        self._flush_task.add_done_callback(self._log_flush_error)
+
+    @staticmethod
+    def _log_flush_error(task: asyncio.Task):
+        if not task.cancelled() and (e := task.exception()):
+            logger.error(f"Failed to emit streamed tokens: {e}")
+
+    async def flush(self):
+        """Emit the pending tokens, one event per message."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        # The lock keeps the events ordered when flushes overlap
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._size = 0
+            for id, (tokens, is_sequence) in pending.items():
+                await self.session.emit(
+                    "stream_token",
+                    {"id": id, "token": "".join(tokens), "isSequence": is_sequence},
+                )
+
+
 class ChainlitEmitter(BaseChainlitEmitter):
     """
     Chainlit Emitter class. The Emitter is not directly exposed to the developer.
@@ -125,6 +200,14 @@ class ChainlitEmitter(BaseChainlitEmitter):
     def __init__(self, session: WebsocketSession) -> None:
         """Initialize with the user session."""
         self.session = session
+        if session.token_coalescer is None:
+            session.token_coalescer = TokenCoalescer(
+                session,
+                interval=config.project.stream_token_interval,
+                max_size=config.project.stream_token_max_size,
+            )
+        # Shared by the emitters of the session
+        self.token_coalescer = session.token_coalescer
 
     def _get_session_property(self, property_name: str, raise_error=True):
         """Helper method to get a property from the session."""
@@ -139,7 +222,14 @@ class ChainlitEmitter(BaseChainlitEmitter):
     def emit(self):
         """Get the 'emit' property from the session."""
 
-        return self._get_session_property("emit")
+        emit = self._get_session_property("emit")
+
+        async def emit_after_tokens(event: str, data: Any):
+            # Keep the events ordered after the tokens waiting to be coalesced
+            await self.token_coalescer.flush()
+            return await emit(event, data)
+
+        return emit_after_tokens
 
     @property
     def emit_call(self):
@@ -147,7 +237,7 @@ class ChainlitEmitter(BaseChainlitEmitter):
         return self._get_session_property("emit_call")
 
     def resume_thread(self, thread_dict: ThreadDict):
-        """Send a thread to the UI to resume it"""
+        """Send a thread to the UI to resume it, with its most recent steps only"""
         return self.emit("resume_thread", thread_dict)
 
     def send_step(self, step_dict: StepDict):
@@ -183,6 +273,8 @@ class ChainlitEmitter(BaseChainlitEmitter):
             except Exception as e:
                 logger.error(f"Error updating thread: {e}")
             await self.session.flush_method_queue()
+            # Send the replayed writes as one batch
+            await data_layer.flush()
 
     async def init_thread(self, interaction: str):
         await self.flush_thread_queues(interaction)
@@ -196,7 +288,7 @@ class ChainlitEmitter(BaseChainlitEmitter):
 
         message = Message.from_dict(step_dict)
         # Overwrite the created_at timestamp with the current time
-        message.created_at = datetime.utcnow().isoformat()
+        message.created_at = utc_now()
 
         asyncio.create_task(message._create())
 
@@ -229,6 +321,7 @@ class ChainlitEmitter(BaseChainlitEmitter):
         """Send a prompt to the UI and wait for a response."""
 
         try:
+            await self.token_coalescer.flush()
             # Send the prompt to the UI
             user_res = await self.emit_call(
                 "ask", {"msg": step_dict, "spec": spec.to_dict()}, spec.timeout
@@ -295,6 +388,7 @@ class ChainlitEmitter(BaseChainlitEmitter):
     ) -> Optional[Dict[str, Any]]:
         """Stub method to send a call function event to the copilot and wait for a response."""
         try:
+            await self.token_coalescer.flush()
             call_fn_res = await self.emit_call(
                 "call_fn", {"name": name, "args": args}, timeout
             )  # type: Dict
@@ -331,10 +425,8 @@ class ChainlitEmitter(BaseChainlitEmitter):
         )
 
     def send_token(self, id: str, token: str, is_sequence=False):
-        """Send a message token to the UI."""
-        return self.emit(
-            "stream_token", {"id": id, "token": token, "isSequence": is_sequence}
-        )
+        """Send a message token to the UI, coalesced with the following ones."""
+        return self.token_coalescer.add(id, token, is_sequence)
 
     def set_chat_settings(self, settings: Dict[str, Any]):
         self.session.chat_settings = settings
@@ -345,4 +437,3 @@ class ChainlitEmitter(BaseChainlitEmitter):
         return self.emit(
             "action_response", {"id": id, "status": status, "response": response}
         )
-    
\ No newline at end of file
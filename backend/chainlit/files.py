@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+import multipart
+from chainlit.logger import logger
+from multipart.multipart import parse_options_header
+
+# Size of the chunks read from the files streamed to the data layers
+CHUNK_SIZE = 1024 * 1024
+
+
+def copy_file(src: str, dst: str, link=True):
+    """
+    Copy a file without reading it in user space memory.
+
+    The file is hardlinked when src and dst are on the same filesystem (and
+    `link` is set): it is then shared, not copied, and must not be modified in
+    place. Otherwise the copy is done by the kernel with copy_file_range, or
+    sendfile through shutil.copyfile.
+    """
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                size = os.fstat(fsrc.fileno()).st_size
+                copied = 0
+                while copied < size:
+                    sent = os.copy_file_range(
+                        fsrc.fileno(), fdst.fileno(), size - copied
+                    )
+                    if sent == 0:
+                        break
+                    copied += sent
+                if copied == size:
+                    return
+        except OSError:
+            # Not supported between these filesystems
+            pass
+
+    shutil.copyfile(src, dst)
+
+
+class FileChunkReader:
+    """
+    Read-only view of a file for HTTP clients, so it is uploaded without being
+    loaded in memory.
+
+    It is file-like (read, seek, tell, fileno), and an async iterator of chunks
+    read in a worker thread. It is deliberately not a sync iterable: async HTTP
+    clients reject sync streams.
+    """
+
+    def __init__(self, path: str, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._file = None  # type: Optional[BinaryIO]
+
+    @property
+    def file(self) -> BinaryIO:
+        if self._file is None:
+            self._file = open(self.path, "rb")
+        return self._file
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self.file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    async def __aiter__(self):
+        # Open and read the file in a worker thread, not to block the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.seek, 0)
+        while chunk := await loop.run_in_executor(None, self.read, self.chunk_size):
+            yield chunk
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class MultipartUpload:
+    """
+    First file of a multipart/form-data body, parsed while the body is received.
+
+    Starlette spools the whole form to disk before calling a handler taking an
+    UploadFile, so limits could only be checked once everything was received.
+    Parsing the request stream instead lets an upload be rejected on its first
+    bytes over a limit.
+    """
+
+    def __init__(self, content_type: Optional[str], body: AsyncIterator[bytes]):
+        mime, options = parse_options_header(content_type or "")
+        boundary = options.get(b"boundary")
+        if mime != b"multipart/form-data" or not boundary:
+            raise ValueError("Expected a multipart/form-data body")
+        self.filename = ""
+        self.content_type = ""
+        self._body = body.__aiter__()
+        self._headers = {}  # type: Dict[bytes, bytes]
+        self._header_field = b""
+        self._header_value = b""
+        # File content parsed from the last body chunk
+        self._data = []  # type: List[bytes]
+        self._in_file = False
+        self._started = False
+        self._finished = False
+        self._eof = False
+        self._parser = multipart.MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        if self._started:
+            return
+        _, options = parse_options_header(
+            self._headers.get(b"content-disposition", b"")
+        )
+        if b"filename" in options:
+            self._started = self._in_file = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self.content_type = self._headers.get(
+                b"content-type", b"application/octet-stream"
+            ).decode("latin-1")
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self._data.append(data[start:end])
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+            self._finished = True
+
+    async def _feed(self):
+        try:
+            chunk = await self._body.__anext__()
+        except StopAsyncIteration:
+            self._parser.finalize()
+            self._eof = True
+            return
+        self._parser.write(chunk)
+
+    async def start(self) -> bool:
+        """Receive the body up to the file content, False if there is no file."""
+        while not self._started and not self._eof:
+            await self._feed()
+        return self._started
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Content of the file, by the chunks of the body it is received in."""
+        while True:
+            if data := b"".join(self._data):
+                self._data.clear()
+                yield data
+            if self._finished:
+                return
+            if self._eof:
+                # The body was cut before the end of the file
+                raise ValueError("Incomplete multipart body")
+            await self._feed()
+
+
+class BlobStore:
+    """
+    Content-addressed store of the session files, shared by all the sessions and
+    workers of the app, so an element sent to many sessions is written once.
+
+    The files of the sessions are hardlinks to the blobs, named after the
+    SHA-256 of their content. The link count of a blob is thus its reference
+    count, across processes: a blob is deleted once the sessions linking it
+    deleted their files. Where hardlinks are not supported, the session files
+    are plain copies and nothing is shared.
+    """
+
+    def __init__(self, root: Path, hash_cache_size=1024):
+        self.root = root
+        self.hash_cache_size = hash_cache_size
+        # (path, inode, size, mtime) -> hash of the files persisted from a path
+        self._hashes = OrderedDict()  # type: OrderedDict[Tuple, str]
+        # Files are hashed in worker threads
+        self._hashes_lock = threading.Lock()
+
+    def blob_path(self, hash: str) -> Path:
+        return self.root / hash[:2] / hash
+
+    def hash_file(self, path: str) -> str:
+        """Hash a file by chunks, the hash of an unchanged file is cached."""
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self._hashes_lock:
+            if hash := self._hashes.get(key):
+                self._hashes.move_to_end(key)
+                return hash
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+        hash = digest.hexdigest()
+        with self._hashes_lock:
+            self._hashes[key] = hash
+            while len(self._hashes) > self.hash_cache_size:
+                self._hashes.popitem(last=False)
+        return hash
+
+    def link(self, hash: str, dst: Path) -> bool:
+        """Create dst from the blob, return False if the blob is not stored."""
+        try:
+            os.link(self.blob_path(hash), dst)
+            return True
+        except OSError:
+            return False
+
+    def add(self, src: Path, hash: str):
+        """
+        Store a new file as the blob of its content. If the blob already exists,
+        the file is replaced by a link to it.
+        """
+        blob = self.blob_path(hash)
+        try:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.link(src, blob)
+        except FileExistsError:
+            try:
+                tmp = src.with_name(src.name + ".tmp")
+                os.link(blob, tmp)
+                os.replace(tmp, src)
+            except OSError:
+                pass
+        except OSError as e:
+            logger.debug(f"Could not store blob {hash}: {e}")
+
+    def release(self, hashes: Iterable[str]):
+        """Delete the blobs no session links anymore, once their files are deleted."""
+        for hash in set(hashes):
+            blob = self.blob_path(hash)
+            try:
+                if os.stat(blob).st_nlink <= 1:
+                    os.unlink(blob)
+            except FileNotFoundError:
+                pass
+
+
+_blob_store = None  # type: Optional[BlobStore]
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        from chainlit.config import FILES_DIRECTORY
+
+        _blob_store = BlobStore(FILES_DIRECTORY / "blobs")
+    return _blob_store
@@ -0,0 +1,205 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import anyio
+from chainlit.logger import logger
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None
+
+# Preferred encodings first
+ENCODINGS = ("br", "gzip")
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def make_etag(data: bytes) -> str:
+    """Strong ETag of a content."""
+    return f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+
+
+def strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag, weak comparison as per RFC 9110."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = strip_weak(etag)
+    return any(
+        strip_weak(candidate.strip()) == etag for candidate in if_none_match.split(",")
+    )
+
+
+def parse_accept_encoding(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Quality value of each encoding accepted by the client."""
+    accepted = {}  # type: Dict[str, float]
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+class PrecompressedContent:
+    """
+    A content compressed once in every supported encoding, with a strong ETag per
+    representation, so serving it is a dictionary lookup.
+    """
+
+    def __init__(self, data: bytes):
+        self.variants = {"identity": data}  # type: Dict[str, bytes]
+        self.variants["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+        if brotli is not None:
+            self.variants["br"] = brotli.compress(data, quality=11)
+        digest = make_etag(data)[1:-1]
+        self.etags = {
+            encoding: f'"{digest}-{encoding}"' for encoding in self.variants
+        }
+        self.etags["identity"] = f'"{digest}"'
+        logger.debug(
+            "Precompressed content: "
+            + ", ".join(f"{k}={len(v)}" for k, v in self.variants.items())
+        )
+
+    def negotiate(self, accept_encoding: Optional[str]) -> str:
+        """Best encoding available for an Accept-Encoding header."""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ENCODINGS:
+            quality = accepted.get(encoding, accepted.get("*", 0))
+            if encoding in self.variants and quality > 0:
+                return encoding
+        return "identity"
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        return any(etag_matches(if_none_match, etag) for etag in self.etags.values())
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range into an inclusive (start, end), clamped to the size.
+    Raise ValueError if the range is not satisfiable, return None if it is not
+    supported (multiple ranges), in which case the whole file is sent.
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if size == 0:
+        # No byte of an empty file can be selected
+        raise ValueError("Range not satisfiable")
+    if not start:
+        # Suffix range, the last bytes of the file
+        length = int(end)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+    if first >= size or first > last:
+        raise ValueError("Range not satisfiable")
+    return first, last
+
+
+def not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+async def read_range(path: Union[str, Path], start: int, end: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def conditional_file_response(
+    request: Request,
+    path: Union[str, Path],
+    media_type: Optional[str] = None,
+    etag: Optional[str] = None,
+    cache_control="private, no-cache",
+) -> Response:
+    """
+    Serve a file with its validators (ETag, Last-Modified), answering
+    conditional requests with a 304 and single byte ranges with a 206, so
+    media elements are not downloaded again on every seek or render.
+    """
+    stat_result = os.stat(path)
+    media_type = media_type or mimetypes.guess_type(str(path))[0] or "text/plain"
+    size = stat_result.st_size
+    if etag is None:
+        etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None
+        and not_modified_since(
+            request.headers.get("if-modified-since"), stat_result.st_mtime
+        )
+    ):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # Send the whole file if it changed since the client got the first bytes
+    if range_header and (if_range is None or if_range in (etag, last_modified)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                read_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(
+        path, media_type=media_type, headers=headers, stat_result=stat_result
+    )
@@ -0,0 +1,166 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from chainlit.logger import logger
+
+# Methods of the data layers whose target can be compacted, by the argument holding its id
+CREATE_METHODS = {"create_step": "step", "create_element": "element"}
+UPDATE_METHODS = {"update_step": "step"}
+DELETE_METHODS = {"delete_step": "step", "delete_element": "element"}
+
+
+class JournalEntry:
+    __slots__ = ("method", "data_layer", "args", "kwargs", "key")
+
+    def __init__(
+        self,
+        method: Callable,
+        data_layer: Any,
+        args: tuple,
+        kwargs: Dict,
+        key: Optional[Tuple[str, str]],
+    ):
+        self.method = method
+        self.data_layer = data_layer
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+
+
+def get_target_id(value: Any) -> Optional[str]:
+    """Id of a step or element, passed as a dict, an object or directly as an id."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return value.get("id")
+    return getattr(value, "id", None)
+
+
+def get_parent_step_id(value: Any) -> Optional[str]:
+    """Id of the step an element is attached to."""
+    if isinstance(value, dict):
+        return value.get("forId")
+    return getattr(value, "for_id", None)
+
+
+class PersistenceJournal:
+    """
+    Ordered journal of the data layer writes of a session made before the first
+    user interaction, when the thread does not exist yet.
+
+    Writes are replayed in the order they were made, whatever the method. The
+    journal is compacted as it grows: an update of a step pending creation is
+    folded into the creation, successive updates are folded together and
+    deleting a step or element pending creation drops all its writes, and the
+    creations of the elements attached to a step. Past `max_entries`, the
+    oldest writes are dropped.
+    """
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self.dropped = 0
+        self._entries = {}  # type: Dict[int, JournalEntry]
+        # Sequence numbers of the pending writes of each target
+        self._by_key = {}  # type: Dict[Tuple[str, str], List[int]]
+        # Step id -> keys of the elements created for it
+        self._elements_by_step = {}  # type: Dict[str, List[Tuple[str, str]]]
+        self._sequence = 0
+        self.flushing = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def active(self) -> bool:
+        """Whether new writes must be journaled to stay after the pending ones."""
+        # Still flushing while the last entry is being written
+        return self.flushing or bool(self._entries)
+
+    def _pending(self, key: Tuple[str, str]) -> List[JournalEntry]:
+        return [self._entries[seq] for seq in self._by_key.get(key, [])]
+
+    def _remove(self, key: Tuple[str, str]):
+        for seq in self._by_key.pop(key, []):
+            self._entries.pop(seq, None)
+        if key[0] == "step":
+            for element_key in self._elements_by_step.pop(key[1], []):
+                self._remove(element_key)
+
+    def _append(self, entry: JournalEntry):
+        if len(self._entries) >= self.max_entries:
+            oldest = next(iter(self._entries))
+            dropped = self._entries.pop(oldest)
+            if dropped.key and (seqs := self._by_key.get(dropped.key)):
+                seqs.remove(oldest)
+                if not seqs:
+                    del self._by_key[dropped.key]
+            self.dropped += 1
+            logger.warning(
+                f"Persistence journal full, dropping {dropped.method.__name__}"
+            )
+
+        self._sequence += 1
+        self._entries[self._sequence] = entry
+        if entry.key:
+            self._by_key.setdefault(entry.key, []).append(self._sequence)
+
+    def record(self, method: Callable, data_layer: Any, args: tuple, kwargs: Dict):
+        name = method.__name__
+        kind = (
+            CREATE_METHODS.get(name)
+            or UPDATE_METHODS.get(name)
+            or DELETE_METHODS.get(name)
+        )
+        target_id = get_target_id(args[0]) if kind and args else None
+        key = (kind, target_id) if kind and target_id else None
+        entry = JournalEntry(method, data_layer, args, kwargs, key)
+        if key is None:
+            self._append(entry)
+            return
+
+        if name == "create_element" and (step_id := get_parent_step_id(args[0])):
+            self._elements_by_step.setdefault(step_id, []).append(key)
+
+        pending = self._pending(key)
+        last = pending[-1] if pending else None
+        if (
+            name in UPDATE_METHODS
+            and last
+            and last.method.__name__ not in DELETE_METHODS
+        ):
+            # The creation or the previous update takes the new state
+            last.args, last.kwargs = args, kwargs
+            return
+
+        if name in DELETE_METHODS:
+            created_here = any(e.method.__name__ in CREATE_METHODS for e in pending)
+            self._remove(key)
+            if created_here:
+                # Never persisted, nothing to delete
+                return
+
+        self._append(entry)
+
+    async def flush(self):
+        """Replay the pending writes in order."""
+        self.flushing = True
+        try:
+            # Writes recorded during the flush are replayed as well
+            while self._entries:
+                seq = next(iter(self._entries))
+                entry = self._entries.pop(seq)
+                if entry.key and (seqs := self._by_key.get(entry.key)):
+                    seqs.remove(seq)
+                    if not seqs:
+                        del self._by_key[entry.key]
+                try:
+                    await entry.method(entry.data_layer, *entry.args, **entry.kwargs)
+                except Exception as e:
+                    logger.error(f"Error while flushing {entry.method.__name__}: {e}")
+        finally:
+            self.flushing = False
+
+    def clear(self):
+        """Drop the pending writes, when the user never interacted."""
+        self._entries.clear()
+        self._by_key.clear()
+        self._elements_by_step.clear()
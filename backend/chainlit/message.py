@@ -1,16 +1,16 @@
 import asyncio
 import json
-import time
 import uuid
 from abc import ABC
-from datetime import datetime
 from typing import Dict, List, Optional, Union, cast
 
 from chainlit.action import Action
+from chainlit.clock import utc_now
 from chainlit.config import config
 from chainlit.context import context
 from chainlit.data import get_data_layer
-from chainlit.element import ElementBased
+from chainlit.data.persistence import get_persistence_queue
+from chainlit.element import ElementBased, guess_elements_mime
 from chainlit.logger import logger
 from chainlit.step import StepDict
 from chainlit.telemetry import trace_event
@@ -111,7 +111,13 @@ class MessageBase(ABC):
         data_layer = get_data_layer()
         if data_layer:
             try:
-                asyncio.create_task(data_layer.update_step(step_dict))
+                await get_persistence_queue().put(
+                    "message update",
+                    data_layer.update_step,
+                    step_dict,
+                    key=self.id,
+                    coalesce=True,
+                )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -131,7 +137,12 @@ class MessageBase(ABC):
         data_layer = get_data_layer()
         if data_layer:
             try:
-                asyncio.create_task(data_layer.delete_step(step_dict["id"]))
+                await get_persistence_queue().put(
+                    "message deletion",
+                    data_layer.delete_step,
+                    step_dict["id"],
+                    key=self.id,
+                )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -146,7 +157,12 @@ class MessageBase(ABC):
         data_layer = get_data_layer()
         if data_layer and not self.persisted:
             try:
-                asyncio.create_task(data_layer.create_step(step_dict))
+                await get_persistence_queue().put(
+                    "message creation",
+                    data_layer.create_step,
+                    step_dict,
+                    key=self.id,
+                )
                 self.persisted = True
             except Exception as e:
                 if self.fail_on_persist_error:
@@ -157,7 +173,7 @@ class MessageBase(ABC):
 
     async def send(self):
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = utc_now()
         if self.content is None:
             self.content = ""
 
@@ -224,7 +240,6 @@ class Message(MessageBase):
         level: Optional[str] = None,
         scene: Optional[str] = None,
     ):
-        time.sleep(0.001)
         self.language = language
         self.generation = generation
         if isinstance(content, dict):
@@ -253,7 +268,6 @@ class Message(MessageBase):
         self.actions = actions if actions is not None else []
         self.elements = elements if elements is not None else []
         self.disable_feedback = disable_feedback
-        print(self.type)
         self.round = round
         super().__post_init__()
 
@@ -267,6 +281,8 @@ class Message(MessageBase):
 
         context.session.root_message = self
 
+        await guess_elements_mime(self.elements)
+
         # Create tasks for all actions and elements
         tasks = [action.send(for_id=self.id) for action in self.actions]
         tasks.extend(element.send(for_id=self.id) for element in self.elements)
@@ -296,6 +312,8 @@ class Message(MessageBase):
         # Use your existing message sending logic here
         # For example, to send as a combined payload:
 
+        await guess_elements_mime(self.elements)
+
          # Create tasks for all actions and elements
         tasks = [action.send(for_id=self.id) for action in self.actions]
         tasks.extend(element.send(for_id=self.id) for element in self.elements)
@@ -311,6 +329,8 @@ class Message(MessageBase):
         trace_event("send_message")
         await super().update()
 
+        await guess_elements_mime(self.elements)
+
         # Update tasks for all actions and elements
         tasks = [
             action.send(for_id=self.id)
@@ -409,7 +429,7 @@ class AskUserMessage(AskMessageBase):
         """
         trace_event("send_ask_user")
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = utc_now()
 
         if config.code.author_rename:
             self.author = await config.code.author_rename(self.author)
@@ -481,7 +501,7 @@ class AskFileMessage(AskMessageBase):
         trace_event("send_ask_file")
 
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = utc_now()
 
         if self.streaming:
             self.streaming = False
@@ -554,7 +574,7 @@ class AskActionMessage(AskMessageBase):
         trace_event("send_ask_action")
 
         if not self.created_at:
-            self.created_at = datetime.utcnow().isoformat()
+            self.created_at = utc_now()
 
         if self.streaming:
             self.streaming = False
@@ -2,9 +2,8 @@ import glob
 import json
 import mimetypes
 import re
-import shutil
 import urllib.parse
-from typing import Any, Optional, Union
+from typing import Any, Dict, Optional, Tuple, Union
 
 from chainlit.oauth_providers import get_oauth_provider
 from chainlit.secret import random_secret
@@ -18,19 +17,28 @@ import webbrowser
 from contextlib import asynccontextmanager
 from pathlib import Path
 
-from chainlit.auth import create_jwt, get_configuration, get_current_user
+import socketio
+from chainlit.auth import (
+    create_jwt,
+    get_configuration,
+    get_current_user,
+    invalidate_cached_user,
+    reuseable_oauth,
+)
 from chainlit.config import (
     APP_ROOT,
     BACKEND_ROOT,
     DEFAULT_HOST,
-    FILES_DIRECTORY,
     PACKAGE_ROOT,
     config,
+    config_translation_dir,
     load_module,
     reload_config,
 )
 from chainlit.data import get_data_layer
 from chainlit.data.acl import is_thread_author
+from chainlit.data.persistence import get_persistence_queue
+from chainlit.http_cache import PrecompressedContent, conditional_file_response
 from chainlit.logger import logger
 from chainlit.markdown import get_markdown_str
 from chainlit.playground.config import get_llm_providers
@@ -50,7 +58,6 @@ from fastapi import (
     Query,
     Request,
     Response,
-    UploadFile,
     status,
 )
 from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, RedirectResponse
@@ -92,6 +99,12 @@ async def lifespan(app: FastAPI):
                 for change_type, file_path in changes:
                     file_name = os.path.basename(file_path)
                     file_ext = os.path.splitext(file_name)[1]
+                    if os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(
+                        config_translation_dir
+                    ):
+                        # Translations are read when building the settings
+                        invalidate_project_settings()
+                        continue
                     if file_ext.lower() in extensions or file_name.lower() in files:
                         logger.info(
                             f"File {change_type.name}: {file_name}. Reloading app..."
@@ -99,6 +112,8 @@ async def lifespan(app: FastAPI):
 
                         try:
                             reload_config()
+                            invalidate_html_shell()
+                            invalidate_project_settings()
                         except Exception as e:
                             logger.error(f"Error reloading config: {e}")
                             break
@@ -128,8 +143,28 @@ async def lifespan(app: FastAPI):
             except asyncio.exceptions.CancelledError:
                 pass
 
-        if FILES_DIRECTORY.is_dir():
-            shutil.rmtree(FILES_DIRECTORY)
+        # The lifespan replaces the shutdown events, run the app handlers here
+        for handler in app.router.on_shutdown:
+            try:
+                if asyncio.iscoroutinefunction(handler):
+                    await handler()
+                else:
+                    handler()
+            except Exception as e:
+                logger.error(f"Error in shutdown handler: {e}")
+
+        # Persist the writes still queued
+        await get_persistence_queue().join(timeout=10)
+        if data_layer := get_data_layer():
+            await data_layer.flush()
+
+        # Only delete the files of this worker's sessions: the other workers
+        # share the files directory and the blobs
+        from chainlit.session import ws_sessions_id
+        from chainlit.socket import release_session
+
+        for session in list(ws_sessions_id.values()):
+            await release_session(session)
 
         # Force exit the process to avoid potential AnyIO threads still running
         os._exit(0)
@@ -180,10 +215,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+def get_socketio_client_manager():
+    """Message queue used by socket.io to reach the clients connected to the other workers."""
+    url = os.environ.get("CHAINLIT_SOCKETIO_MESSAGE_QUEUE")
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return socketio.AsyncRedisManager(url)
+    if url.startswith(("amqp://", "amqps://")):
+        return socketio.AsyncAioPikaManager(url)
+    raise ValueError(f"Unsupported socket.io message queue: {url}")
+
+
 socket = SocketManager(
     app,
     cors_allowed_origins=[],
     async_mode="asgi",
+    client_manager=get_socketio_client_manager(),
 )
 
 
@@ -197,6 +246,22 @@ def replace_between_tags(text: str, start_tag: str, end_tag: str, replacement: s
     return re.sub(pattern, start_tag + replacement + end_tag, text, flags=re.DOTALL)
 
 
+# UI page rendered from the config, reset when the config is reloaded
+_html_shell = None  # type: Optional[PrecompressedContent]
+
+
+def get_html_shell() -> PrecompressedContent:
+    global _html_shell
+    if _html_shell is None:
+        _html_shell = PrecompressedContent(get_html_template().encode("utf-8"))
+    return _html_shell
+
+
+def invalidate_html_shell():
+    global _html_shell
+    _html_shell = None
+
+
 def get_html_template():
     PLACEHOLDER = "<!-- TAG INJECTION PLACEHOLDER -->"
     JS_PLACEHOLDER = "<!-- JS INJECTION PLACEHOLDER -->"
@@ -304,6 +369,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
 
 @app.post("/logout")
 async def logout(request: Request, response: Response):
+    invalidate_cached_user(await reuseable_oauth(request))
     if config.code.on_logout:
         return await config.code.on_logout(request, response)
     return {"success": True}
@@ -497,6 +563,61 @@ async def get_providers(
     return JSONResponse(content={"providers": providers})
 
 
+@app.get("/project/persistence")
+async def get_persistence_metrics(
+    current_user: Annotated[Union[User, PersistedUser], Depends(get_current_user)]
+):
+    """Counters of the queue of the data layer writes."""
+    return JSONResponse(content=get_persistence_queue().metrics.to_dict())
+
+
+# Serialized project settings by language, without the chat profiles which
+# depend on the user. Reset when the config or a translation changes.
+# Language -> (mtimes of the markdown and translation files, settings)
+_project_settings = {}  # type: Dict[str, Tuple[Tuple, str]]
+
+
+def get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_project_settings_json(language: str) -> str:
+    translation_path = os.path.join(config_translation_dir, f"{language}.json")
+    # Edits of the files are picked up without the watcher
+    version = (
+        get_mtime(os.path.join(config.root, "chainlit.md")),
+        get_mtime(translation_path),
+    )
+    if (cached := _project_settings.get(language)) and cached[0] == version:
+        return cached[1]
+    settings = json.dumps(
+        {
+            "ui": config.ui.to_dict(),
+            "features": config.features.to_dict(),
+            "userEnv": config.project.user_env,
+            "dataPersistence": get_data_layer() is not None,
+            "threadResumable": bool(config.code.on_chat_resume),
+            "markdown": get_markdown_str(config.root),
+            # Load translation based on the provided language
+            "translation": config.load_translation(language),
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    # Only cache the languages having a translation file, the others fall back
+    # to the default one
+    if version[1] is not None:
+        _project_settings[language] = (version, settings)
+    return settings
+
+
+def invalidate_project_settings():
+    _project_settings.clear()
+
+
 @app.get("/project/settings")
 async def project_settings(
     current_user: Annotated[Union[User, PersistedUser], Depends(get_current_user)],
@@ -504,26 +625,21 @@ async def project_settings(
 ):
     """Return project settings. This is called by the UI before the establishing the websocket connection."""
 
-    # Load translation based on the provided language
-    translation = config.load_translation(language)
-
     profiles = []
     if config.code.set_chat_profiles:
         chat_profiles = await config.code.set_chat_profiles(current_user)
         if chat_profiles:
             profiles = [p.to_dict() for p in chat_profiles]
-    return JSONResponse(
-        content={
-            "ui": config.ui.to_dict(),
-            "features": config.features.to_dict(),
-            "userEnv": config.project.user_env,
-            "dataPersistence": get_data_layer() is not None,
-            "threadResumable": bool(config.code.on_chat_resume),
-            "markdown": get_markdown_str(config.root),
-            "chatProfiles": profiles,
-            "translation": translation,
-        }
+
+    settings = get_project_settings_json(language)
+    # Add the profiles of the user to the cached settings
+    content = (
+        settings[:-1]
+        + ',"chatProfiles":'
+        + json.dumps(profiles, ensure_ascii=False, separators=(",", ":"))
+        + "}"
     )
+    return Response(content=content, media_type="application/json")
 
 
 @app.put("/feedback")
@@ -623,15 +739,20 @@ async def delete_thread(
     return JSONResponse(content={"success": True})
 
 
+# Allowance for the multipart boundaries and headers around an uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
 @app.post("/project/file")
 async def upload_file(
+    request: Request,
     session_id: str,
-    file: UploadFile,
     current_user: Annotated[
         Union[None, User, PersistedUser], Depends(get_current_user)
     ],
 ):
-    from chainlit.session import WebsocketSession
+    from chainlit.files import MultipartUpload
+    from chainlit.session import MB, UploadLimitExceeded, WebsocketSession
 
     session = WebsocketSession.get_by_id(session_id)
 
@@ -648,19 +769,42 @@ async def upload_file(
                 detail="You are not authorized to upload files for this session",
             )
 
-    session.files_dir.mkdir(exist_ok=True)
-
-    content = await file.read()
+    # Reject too large files before receiving them
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit():
+        body_size = int(content_length) - MULTIPART_OVERHEAD
+        if body_size > config.project.upload_max_size_mb * MB:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File larger than {config.project.upload_max_size_mb}MB",
+            )
+        session_left = (
+            config.project.session_upload_quota_mb * MB
+            - session.files_size
+            - session.uploading_size
+        )
+        if body_size > session_left:
+            raise HTTPException(status_code=413, detail="Upload quota exceeded")
 
-    file_response = await session.persist_file(
-        name=file.filename, content=content, mime=file.content_type
-    )
+    # The limits are enforced on each chunk as the body is received
+    try:
+        upload = MultipartUpload(request.headers.get("content-type"), request.stream())
+        if not await upload.start():
+            raise HTTPException(status_code=400, detail="No file in the request")
+        file_response = await session.persist_stream(
+            name=upload.filename, mime=upload.content_type, chunks=upload.chunks()
+        )
+    except UploadLimitExceeded as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return JSONResponse(file_response)
 
 
 @app.get("/project/file/{file_id}")
 async def get_file(
+    request: Request,
     file_id: str,
     session_id: Optional[str] = None,
 ):
@@ -676,13 +820,23 @@ async def get_file(
 
     if file_id in session.files:
         file = session.files[file_id]
-        return FileResponse(file["path"], media_type=file["type"])
+        if file.get("hash"):
+            # The content of a file id never changes
+            return conditional_file_response(
+                request,
+                file["path"],
+                media_type=file["type"],
+                etag=f'"{file["hash"]}"',
+                cache_control="private, max-age=31536000, immutable",
+            )
+        return conditional_file_response(request, file["path"], file["type"])
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
 
 @app.get("/files/{filename:path}")
 async def serve_file(
+    request: Request,
     filename: str,
     current_user: Annotated[Union[User, PersistedUser], Depends(get_current_user)],
 ):
@@ -694,7 +848,7 @@ async def serve_file(
         raise HTTPException(status_code=400, detail="Invalid filename")
 
     if file_path.is_file():
-        return FileResponse(file_path)
+        return conditional_file_response(request, file_path)
     else:
         raise HTTPException(status_code=404, detail="File not found")
 
@@ -742,11 +896,22 @@ async def get_logo(theme: Optional[Theme] = Query(Theme.light)):
 def register_wildcard_route_handler():
     @app.get("/{path:path}")
     async def serve(request: Request, path: str):
-        html_template = get_html_template()
         """Serve the UI files."""
-        response = HTMLResponse(content=html_template, status_code=200)
-
-        return response
+        html_shell = get_html_shell()
+        encoding = html_shell.negotiate(request.headers.get("accept-encoding"))
+        headers = {
+            "ETag": html_shell.etags[encoding],
+            # Always revalidated, the page changes with the config
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if html_shell.not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return HTMLResponse(
+            content=html_shell.variants[encoding], status_code=200, headers=headers
+        )
 
 
 import chainlit.socket  # noqa
@@ -1,12 +1,17 @@
+import asyncio
+import functools
+import hashlib
 import json
 import mimetypes
 import shutil
 import uuid
+from pathlib import Path
 from typing import (
     TYPE_CHECKING,
     Any,
+    AsyncIterator,
+    Awaitable,
     Callable,
-    Deque,
     Dict,
     List,
     Literal,
@@ -15,9 +20,11 @@ from typing import (
 )
 
 import aiofiles
-from chainlit.logger import logger
+from chainlit.files import copy_file, get_blob_store
+from chainlit.journal import PersistenceJournal
 
 if TYPE_CHECKING:
+    from chainlit.emitter import TokenCoalescer
     from chainlit.message import Message
     from chainlit.step import Step
     from chainlit.types import FileDict, FileReference
@@ -25,6 +32,19 @@ if TYPE_CHECKING:
 
 ClientType = Literal["app", "copilot", "teams", "slack"]
 
+MB = 1024 * 1024
+
+
+class UploadLimitExceeded(Exception):
+    """An upload goes beyond the maximum file size or a storage quota."""
+
+
+# Bytes written by the uploads in progress, counted in the server quota
+_uploading_size = 0
+
+# Scans the mimetypes tables on each call
+guess_extension = functools.lru_cache(maxsize=256)(mimetypes.guess_extension)
+
 
 class JSONEncoderIgnoreNonSerializable(json.JSONEncoder):
     def default(self, obj):
@@ -147,7 +167,7 @@ class WebsocketSession(BaseSession):
         # Associated socket id
         socket_id: str,
         # Function to emit to the client
-        emit: Callable[[str, Any], None],
+        emit: Callable[[str, Any], Awaitable[Any]],
         # Function to emit to the client and wait for a response
         emit_call: Callable[[Literal["ask", "call_fn"], Any, Optional[int]], Any],
         # User specific environment variables. Empty if no user environment variables are required.
@@ -185,8 +205,11 @@ class WebsocketSession(BaseSession):
         self.restored = False
         self.career = ""
         self.current_prompt = ""
-        self.thread_queues = {}  # type: Dict[str, Deque[Callable]]
+        self.persistence_journal = PersistenceJournal()
         self.files = {}  # type: Dict[str, "FileDict"]
+        # Bytes written by the uploads in progress, counted in the session quota
+        self.uploading_size = 0
+        self.token_coalescer = None  # type: Optional[TokenCoalescer]
 
         ws_sessions_id[self.id] = self
         ws_sessions_sid[socket_id] = self
@@ -197,54 +220,144 @@ class WebsocketSession(BaseSession):
 
         return FILES_DIRECTORY / self.id
 
-    async def persist_file(
-        self,
-        name: str,
-        mime: str,
-        path: Optional[str] = None,
-        content: Optional[Union[bytes, str]] = None,
-    ) -> "FileReference":
-        if not path and not content:
-            raise ValueError(
-                "Either path or content must be provided to persist a file"
-            )
+    @property
+    def files_size(self) -> int:
+        """Size of the files stored for the session, in bytes."""
+        return sum(file["size"] for file in self.files.values())
 
-        self.files_dir.mkdir(exist_ok=True)
+    def _new_file_path(self, mime: str):
+        self.files_dir.mkdir(parents=True, exist_ok=True)
 
         file_id = str(uuid.uuid4())
 
         file_path = self.files_dir / file_id
 
-        file_extension = mimetypes.guess_extension(mime)
+        file_extension = guess_extension(mime)
         if file_extension:
             file_path = file_path.with_suffix(file_extension)
 
-        if path:
-            # Copy the file from the given path
-            async with aiofiles.open(path, "rb") as src, aiofiles.open(
-                file_path, "wb"
-            ) as dst:
-                await dst.write(await src.read())
-        elif content:
-            # Write the provided content to the file
-            async with aiofiles.open(file_path, "wb") as buffer:
-                if isinstance(content, str):
-                    content = content.encode("utf-8")
-                await buffer.write(content)
+        return file_id, file_path
 
-        # Get the file size
-        file_size = file_path.stat().st_size
+    def _add_file(
+        self,
+        file_id: str,
+        file_path: Path,
+        name: str,
+        mime: str,
+        size: int,
+        hash: Optional[str],
+    ) -> "FileReference":
         # Store the file content in memory
         self.files[file_id] = {
             "id": file_id,
-            "path": file_path,
+            "path": str(file_path),
             "name": name,
             "type": mime,
-            "size": file_size,
+            "size": size,
+            "hash": hash,
         }
 
         return {"id": file_id}
 
+    async def persist_file(
+        self,
+        name: str,
+        mime: str,
+        path: Optional[str] = None,
+        content: Optional[Union[bytes, str]] = None,
+    ) -> "FileReference":
+        if not path and not content:
+            raise ValueError(
+                "Either path or content must be provided to persist a file"
+            )
+
+        file_id, file_path = self._new_file_path(mime)
+        blob_store = get_blob_store()
+        loop = asyncio.get_running_loop()
+
+        if path:
+            hash = await loop.run_in_executor(None, blob_store.hash_file, path)
+            if not blob_store.link(hash, file_path):
+                # Copy the file from the given path, without reading it. Not
+                # linked: the blob must not change if the source is modified
+                await loop.run_in_executor(None, copy_file, path, str(file_path), False)
+                blob_store.add(file_path, hash)
+        elif content is not None:
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            hash = hashlib.sha256(content).hexdigest()
+            if not blob_store.link(hash, file_path):
+                # Write the provided content to the file
+                async with aiofiles.open(file_path, "wb") as buffer:
+                    await buffer.write(content)
+                blob_store.add(file_path, hash)
+
+        # Get the file size
+        file_size = (await loop.run_in_executor(None, file_path.stat)).st_size
+        return self._add_file(file_id, file_path, name, mime, file_size, hash)
+
+    def _reserve_upload(self, size: int):
+        """Count bytes being uploaded in the session and server quotas."""
+        global _uploading_size
+        _uploading_size += size
+        self.uploading_size += size
+
+    async def persist_stream(
+        self, name: str, mime: str, chunks: AsyncIterator[bytes]
+    ) -> "FileReference":
+        """
+        Write a file received by chunks, hashing it on the way, so it is never
+        fully held in memory. Raise UploadLimitExceeded, and delete the partial
+        file, when it goes beyond the maximum file size or the session or server
+        quotas set in the project config.
+        """
+        from chainlit.config import config
+
+        limit = config.project.upload_max_size_mb * MB
+        session_quota = config.project.session_upload_quota_mb * MB
+        server_quota = config.project.upload_quota_mb * MB
+        stored_size = get_stored_files_size() - _uploading_size
+
+        file_id, file_path = self._new_file_path(mime)
+        digest = hashlib.sha256()
+        size = 0
+        # Bytes counted in the quotas while uploading
+        reserved = 0
+        try:
+            async with aiofiles.open(file_path, "wb") as f:
+                try:
+                    async for chunk in chunks:
+                        size += len(chunk)
+                        if size > limit:
+                            raise UploadLimitExceeded(
+                                "File larger than "
+                                f"{config.project.upload_max_size_mb}MB"
+                            )
+                        if (
+                            self.files_size + self.uploading_size + len(chunk)
+                            > session_quota
+                            or stored_size + _uploading_size + len(chunk) > server_quota
+                        ):
+                            raise UploadLimitExceeded("Upload quota exceeded")
+                        self._reserve_upload(len(chunk))
+                        reserved += len(chunk)
+                        digest.update(chunk)
+                        await f.write(chunk)
+                except BaseException:
+                    # Free the quotas for the other uploads before closing the file
+                    self._reserve_upload(-reserved)
+                    reserved = 0
+                    raise
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
+        finally:
+            self._reserve_upload(-reserved)
+
+        hash = digest.hexdigest()
+        get_blob_store().add(file_path, hash)
+        return self._add_file(file_id, file_path, name, mime, size, hash)
+
     def restore(self, new_socket_id: str):
         """Associate a new socket id to the session."""
         ws_sessions_sid.pop(self.socket_id, None)
@@ -252,21 +365,69 @@ class WebsocketSession(BaseSession):
         self.socket_id = new_socket_id
         self.restored = True
 
-    def delete(self):
+    def to_snapshot(self) -> Dict:
+        """Serializable state of the session, used to restore it in another worker."""
+        return {
+            "thread_id": self.thread_id,
+            "thread_id_to_resume": self.thread_id_to_resume,
+            "client_type": self.client_type,
+            "user_identifier": self.user.identifier if self.user else None,
+            "user_env": self.user_env,
+            "has_first_interaction": self.has_first_interaction,
+            "files": dict(self.files),
+            "user_session": self.to_persistable(),
+        }
+
+    @classmethod
+    def from_snapshot(
+        cls,
+        id: str,
+        snapshot: Dict,
+        socket_id: str,
+        emit: Callable[[str, Any], Awaitable[Any]],
+        emit_call: Callable[[Literal["ask", "call_fn"], Any, Optional[int]], Any],
+        user: Optional[Union["User", "PersistedUser"]] = None,
+        token: Optional[str] = None,
+    ) -> "WebsocketSession":
+        """Restore a session created by another worker."""
+        from chainlit.user_session import user_sessions
+
+        user_session = snapshot.get("user_session") or {}
+        session = cls(
+            id=id,
+            socket_id=socket_id,
+            emit=emit,
+            emit_call=emit_call,
+            user_env=snapshot.get("user_env") or {},
+            client_type=snapshot["client_type"],
+            thread_id=snapshot["thread_id"],
+            user=user,
+            token=token,
+            chat_profile=user_session.get("chat_profile"),
+        )
+        session.thread_id_to_resume = snapshot.get("thread_id_to_resume")
+        session.has_first_interaction = snapshot.get("has_first_interaction", False)
+        session.chat_settings = user_session.get("chat_settings") or {}
+        session.files = dict(snapshot.get("files") or {})
+        session.restored = True
+        user_sessions[id] = user_session
+        return session
+
+    def delete(self, delete_files=True):
         """Delete the session."""
-        if self.files_dir.is_dir():
+        self.persistence_journal.clear()
+        if delete_files and self.files_dir.is_dir():
             shutil.rmtree(self.files_dir)
+            # Collect the blobs only used by this session
+            get_blob_store().release(
+                file["hash"] for file in self.files.values() if file.get("hash")
+            )
         ws_sessions_sid.pop(self.socket_id, None)
         ws_sessions_id.pop(self.id, None)
 
     async def flush_method_queue(self):
-        for method_name, queue in self.thread_queues.items():
-            while queue:
-                method, self, args, kwargs = queue.popleft()
-                try:
-                    await method(self, *args, **kwargs)
-                except Exception as e:
-                    logger.error(f"Error while flushing {method_name}: {e}")
+        """Replay the data layer writes journaled before the first interaction."""
+        await self.persistence_journal.flush()
 
     @classmethod
     def get(cls, socket_id: str):
@@ -288,3 +449,10 @@ class WebsocketSession(BaseSession):
 
 ws_sessions_sid: Dict[str, WebsocketSession] = {}
 ws_sessions_id: Dict[str, WebsocketSession] = {}
+
+
+def get_stored_files_size() -> int:
+    """Size of the files of all the sessions of the process, uploads in progress included."""
+    return (
+        sum(session.files_size for session in ws_sessions_id.values()) + _uploading_size
+    )
@@ -0,0 +1,202 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from chainlit.config import config
+from chainlit.logger import logger
+
+# Identify the process owning a session, several workers can share a registry
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class BaseSessionRegistry(ABC):
+    """
+    Registry of the websocket sessions shared by the workers serving the app.
+
+    Live sessions (with their socket and running tasks) stay in the worker which
+    created them. The registry stores a JSON snapshot of each session, with the
+    worker owning it, so that a client reconnecting to another worker gets its
+    session restored there instead of a new one.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else config.project.session_timeout
+
+    @abstractmethod
+    def save(self, session_id: str, state: Dict):
+        """Store the snapshot of a session, owned by the current worker."""
+        pass
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[Tuple[str, Dict]]:
+        """Return the owner and the snapshot of a session, None if it does not exist or expired."""
+        pass
+
+    @abstractmethod
+    def release(self, session_id: str) -> bool:
+        """
+        Delete a session if it is owned by the current worker.
+        Return False if another worker took it over.
+        """
+        pass
+
+
+class InMemorySessionRegistry(BaseSessionRegistry):
+    """Default registry, only shared within the process."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self._sessions = {}  # type: Dict[str, Tuple[str, Dict, float]]
+
+    def save(self, session_id: str, state: Dict):
+        self._sessions[session_id] = (WORKER_ID, state, time.time() + self.ttl)
+
+    def load(self, session_id: str):
+        entry = self._sessions.get(session_id)
+        if not entry or entry[2] < time.time():
+            return None
+        return entry[0], entry[1]
+
+    def release(self, session_id: str):
+        entry = self._sessions.get(session_id)
+        if entry and entry[0] != WORKER_ID:
+            return False
+        self._sessions.pop(session_id, None)
+        return True
+
+
+class SQLiteSessionRegistry(BaseSessionRegistry):
+    """Registry stored in a SQLite file, shared by the workers of a host."""
+
+    def __init__(self, path: str, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chainlit_sessions (
+                    id TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+                """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chainlit_sessions_expires_at ON chainlit_sessions(expires_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, session_id: str, state: Dict):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chainlit_sessions (id, owner, state, expires_at) VALUES (?, ?, ?, ?)",
+                (session_id, WORKER_ID, json.dumps(state), now + self.ttl),
+            )
+            conn.execute("DELETE FROM chainlit_sessions WHERE expires_at < ?", (now,))
+
+    def load(self, session_id: str):
+        row = (
+            self._connection()
+            .execute(
+                "SELECT owner, state FROM chainlit_sessions WHERE id = ? AND expires_at >= ?",
+                (session_id, time.time()),
+            )
+            .fetchone()
+        )
+        if not row:
+            return None
+        return row[0], json.loads(row[1])
+
+    def release(self, session_id: str):
+        with self._connection() as conn:
+            conn.execute(
+                "DELETE FROM chainlit_sessions WHERE id = ? AND owner = ?",
+                (session_id, WORKER_ID),
+            )
+            owner = conn.execute(
+                "SELECT owner FROM chainlit_sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        return owner is None
+
+
+class RedisSessionRegistry(BaseSessionRegistry):
+    """Registry stored in Redis (or any server speaking its protocol), shared by all the workers."""
+
+    # Delete the key only if the current worker still owns it
+    RELEASE_SCRIPT = """
+    local owner = redis.call('HGET', KEYS[1], 'owner')
+    if owner == false or owner == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(
+        self, url: str, ttl: Optional[float] = None, prefix="chainlit:session:"
+    ):
+        super().__init__(ttl)
+        try:
+            import redis
+        except ImportError:
+            raise ValueError(
+                "The redis package is required to use a Redis session registry"
+            )
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._release = self.client.register_script(self.RELEASE_SCRIPT)
+
+    def save(self, session_id: str, state: Dict):
+        key = self.prefix + session_id
+        pipeline = self.client.pipeline()
+        pipeline.hset(key, mapping={"owner": WORKER_ID, "state": json.dumps(state)})
+        pipeline.expire(key, int(self.ttl))
+        pipeline.execute()
+
+    def load(self, session_id: str):
+        owner, state = self.client.hmget(self.prefix + session_id, "owner", "state")
+        if owner is None or state is None:
+            return None
+        return owner.decode("utf-8"), json.loads(state)
+
+    def release(self, session_id: str):
+        return bool(self._release(keys=[self.prefix + session_id], args=[WORKER_ID]))
+
+
+def create_session_registry(url: Optional[str]) -> BaseSessionRegistry:
+    """Create a registry from an url: memory:// (default), sqlite:///path/to/file.db or redis://host:port/db."""
+    if not url or url.startswith("memory:"):
+        return InMemorySessionRegistry()
+    scheme = urlparse(url).scheme
+    if scheme == "sqlite":
+        return SQLiteSessionRegistry(url[len("sqlite:///") :])
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisSessionRegistry(url)
+    raise ValueError(f"Unsupported session registry: {url}")
+
+
+_session_registry = None  # type: Optional[BaseSessionRegistry]
+
+
+def get_session_registry() -> BaseSessionRegistry:
+    global _session_registry
+    if _session_registry is None:
+        url = os.environ.get("CHAINLIT_SESSION_REGISTRY")
+        _session_registry = create_session_registry(url)
+        if url:
+            logger.info(f"Using session registry {type(_session_registry).__name__}")
+    return _session_registry
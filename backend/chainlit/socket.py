@@ -2,7 +2,7 @@ import asyncio
 import json
 import uuid
 from datetime import datetime
-from typing import Any, Dict, Literal
+from typing import Any, Dict, Literal, Optional
 
 from chainlit.action import Action
 from chainlit.auth import get_current_user, require_login
@@ -13,12 +13,29 @@ from chainlit.logger import logger
 from chainlit.message import ErrorMessage, Message
 from chainlit.server import socket
 from chainlit.session import WebsocketSession
+from chainlit.session_registry import WORKER_ID, get_session_registry
+from chainlit.sync import make_async
 from chainlit.telemetry import trace_event
-from chainlit.types import UIMessagePayload
+from chainlit.types import Pagination, UIMessagePayload
 from chainlit.user_session import user_sessions
 
 
-def restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
+async def release_session(session: WebsocketSession):
+    """Delete a session of this worker, keep its files if another worker took it."""
+    # Clean up the user session
+    if session.id in user_sessions:
+        user_sessions.pop(session.id)
+    try:
+        owned = await make_async(get_session_registry().release)(session.id)
+    except Exception as e:
+        logger.error(f"Error releasing the session from the registry: {e}")
+        owned = True
+    session.delete(delete_files=owned)
+
+
+async def restore_existing_session(
+    sid, session_id, emit_fn, emit_call_fn, user=None, token=None
+):
     """Restore a session from the sessionId provided by the client."""
     if session := WebsocketSession.get_by_id(session_id):
         session.restore(new_socket_id=sid)
@@ -26,7 +43,40 @@ def restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
         session.emit_call = emit_call_fn
         trace_event("session_restored")
         return True
-    return False
+
+    if not session_id:
+        return False
+
+    # The session may have been created by another worker
+    registry = get_session_registry()
+    entry = await make_async(registry.load)(session_id)
+    if not entry:
+        return False
+    owner, snapshot = entry
+    user_identifier = user.identifier if user else None
+    if owner == WORKER_ID or snapshot.get("user_identifier") != user_identifier:
+        return False
+
+    session = WebsocketSession.from_snapshot(
+        session_id,
+        snapshot,
+        socket_id=sid,
+        emit=emit_fn,
+        emit_call=emit_call_fn,
+        user=user,
+        token=token,
+    )
+    await save_session(session)
+    trace_event("session_restored")
+    return True
+
+
+async def save_session(session: WebsocketSession):
+    """Share the session with the other workers."""
+    try:
+        await make_async(get_session_registry().save)(session.id, session.to_snapshot())
+    except Exception as e:
+        logger.error(f"Error saving the session to the registry: {e}")
 
 
 async def persist_user_session(thread_id: str, metadata: Dict):
@@ -38,7 +88,11 @@ async def resume_thread(session: WebsocketSession):
     data_layer = get_data_layer()
     if not data_layer or not session.user or not session.thread_id_to_resume:
         return
-    thread = await data_layer.get_thread(thread_id=session.thread_id_to_resume)
+    # Only the most recent steps, the older ones are loaded on demand
+    thread = await data_layer.get_thread_page(
+        session.thread_id_to_resume,
+        Pagination(first=config.project.resume_page_size),
+    )
     if not thread:
         return
 
@@ -101,10 +155,16 @@ async def connect(sid, environ, auth):
     user = None
     token = None
     login_required = require_login()
+
+    def handshake_value(key: str, header: str) -> Optional[str]:
+        # Sent in the auth payload, so the client can connect with a websocket
+        # only, or in a header by older clients
+        return (auth or {}).get(key) or environ.get(header)
+
     try:
         # Check if the authentication is required
         if login_required:
-            authorization_header = environ.get("HTTP_AUTHORIZATION")
+            authorization_header = handshake_value("accessToken", "HTTP_AUTHORIZATION")
             token = authorization_header.split(" ")[1] if authorization_header else None
             user = await get_current_user(token=token)
     except Exception as e:
@@ -127,14 +187,16 @@ async def connect(sid, environ, auth):
                 raise InterruptedError("Task stopped by user")
         return socket.call(event, data, timeout=timeout, to=sid)
 
-    session_id = environ.get("HTTP_X_CHAINLIT_SESSION_ID")
-    if restore_existing_session(sid, session_id, emit_fn, emit_call_fn):
+    session_id = handshake_value("sessionId", "HTTP_X_CHAINLIT_SESSION_ID")
+    if await restore_existing_session(
+        sid, session_id, emit_fn, emit_call_fn, user=user, token=token
+    ):
         return True
 
-    user_env_string = environ.get("HTTP_USER_ENV")
+    user_env_string = handshake_value("userEnv", "HTTP_USER_ENV")
     user_env = load_user_env(user_env_string)
 
-    client_type = environ.get("HTTP_X_CHAINLIT_CLIENT_TYPE")
+    client_type = handshake_value("clientType", "HTTP_X_CHAINLIT_CLIENT_TYPE")
 
     ws_session = WebsocketSession(
         id=session_id,
@@ -145,10 +207,10 @@ async def connect(sid, environ, auth):
         user_env=user_env,
         user=user,
         token=token,
-        chat_profile=environ.get("HTTP_X_CHAINLIT_CHAT_PROFILE"),
-        thread_id=environ.get("HTTP_X_CHAINLIT_THREAD_ID"),
+        chat_profile=handshake_value("chatProfile", "HTTP_X_CHAINLIT_CHAT_PROFILE"),
+        thread_id=handshake_value("threadId", "HTTP_X_CHAINLIT_THREAD_ID"),
     )
-
+    await save_session(ws_session)
 
     trace_event("connection_successful")
     return True
@@ -171,7 +233,10 @@ async def connection_successful(sid):
             context.session.has_first_interaction = True
             await context.emitter.emit("first_interaction", "resume")
             await context.emitter.resume_thread(thread)
-            await config.code.on_chat_resume(thread)
+            # The hook may rebuild its memory from the whole history
+            data_layer = get_data_layer()
+            full_thread = data_layer and await data_layer.get_thread(thread["id"])
+            await config.code.on_chat_resume(full_thread or thread)
             return
 
     if config.code.on_chat_start:
@@ -195,20 +260,20 @@ async def disconnect(sid, force_clear=False):
     if session and session.thread_id and session.has_first_interaction:
         await persist_user_session(session.thread_id, session.to_persistable())
 
-    def clear():
+    if session:
+        # The client may reconnect to another worker
+        await save_session(session)
+
+    async def clear():
         if session := WebsocketSession.get(sid):
-            # Clean up the user session
-            if session.id in user_sessions:
-                user_sessions.pop(session.id)
-            # Clean up the session
-            session.delete()
+            await release_session(session)
 
     async def clear_on_timeout(sid):
         await asyncio.sleep(config.project.session_timeout)
-        clear()
+        await clear()
 
     if force_clear:
-        clear()
+        await clear()
     else:
         asyncio.ensure_future(clear_on_timeout(sid))
 
@@ -277,6 +342,23 @@ async def message(sid, payload: UIMessagePayload):
     await process_message(session, payload)
 
 
+@socket.on("load_thread_page")
+async def load_thread_page(sid, payload: Dict):
+    """Send a page of older steps of the resumed thread."""
+    session = WebsocketSession.require(sid)
+    data_layer = get_data_layer()
+    thread_id = session.thread_id_to_resume
+    if not data_layer or not session.user or not thread_id:
+        return None
+    if await data_layer.get_thread_author(thread_id) != session.user.identifier:
+        return None
+    return await data_layer.get_thread_steps(
+        thread_id,
+        Pagination(
+            first=config.project.resume_page_size, cursor=payload.get("cursor")
+        ),
+    )
+
 
 async def process_action(action: Action):
     callback = config.code.action_callbacks.get(action.name)
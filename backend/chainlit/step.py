@@ -1,15 +1,15 @@
 import asyncio
 import inspect
 import json
-import time
 import uuid
-from datetime import datetime
 from functools import wraps
 from typing import Callable, Dict, List, Optional, TypedDict, Union
 
+from chainlit.clock import utc_now
 from chainlit.config import config
 from chainlit.context import context, local_steps
 from chainlit.data import get_data_layer
+from chainlit.data.persistence import get_persistence_queue
 from chainlit.element import Element
 from chainlit.logger import logger
 from chainlit.telemetry import trace_event
@@ -166,7 +166,6 @@ class Step:
         round = 0
     ):
         trace_event(f"init {self.__class__.__name__} {type}")
-        time.sleep(0.001)
         self._input = ""
         self._output = ""
         self.thread_id = context.session.thread_id
@@ -184,7 +183,7 @@ class Step:
         self.generation = None
         self.elements = elements or []
 
-        self.created_at = datetime.utcnow().isoformat()
+        self.created_at = utc_now()
         self.start = None
         self.end = None
 
@@ -269,7 +268,13 @@ class Step:
 
         if data_layer:
             try:
-                asyncio.create_task(data_layer.update_step(step_dict.copy()))
+                await get_persistence_queue().put(
+                    "step update",
+                    data_layer.update_step,
+                    step_dict.copy(),
+                    key=self.id,
+                    coalesce=True,
+                )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -299,7 +304,9 @@ class Step:
 
         if data_layer:
             try:
-                asyncio.create_task(data_layer.delete_step(self.id))
+                await get_persistence_queue().put(
+                    "step deletion", data_layer.delete_step, self.id, key=self.id
+                )
             except Exception as e:
                 if self.fail_on_persist_error:
                     raise e
@@ -325,7 +332,12 @@ class Step:
 
         if data_layer:
             try:
-                asyncio.create_task(data_layer.create_step(step_dict.copy()))
+                await get_persistence_queue().put(
+                    "step creation",
+                    data_layer.create_step,
+                    step_dict.copy(),
+                    key=self.id,
+                )
                 self.persisted = True
             except Exception as e:
                 if self.fail_on_persist_error:
@@ -384,7 +396,7 @@ class Step:
 
     # Handle Context Manager Protocol
     async def __aenter__(self):
-        self.start = datetime.utcnow().isoformat()
+        self.start = utc_now()
         previous_steps = local_steps.get() or []
         parent_step = previous_steps[-1] if previous_steps else None
 
@@ -399,7 +411,7 @@ class Step:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        self.end = datetime.utcnow().isoformat()
+        self.end = utc_now()
 
         if self in context.active_steps:
             context.active_steps.remove(self)
@@ -412,7 +424,7 @@ class Step:
         await self.update()
 
     def __enter__(self):
-        self.start = datetime.utcnow().isoformat()
+        self.start = utc_now()
 
         previous_steps = local_steps.get() or []
         parent_step = previous_steps[-1] if previous_steps else None
@@ -429,7 +441,7 @@ class Step:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end = datetime.utcnow().isoformat()
+        self.end = utc_now()
         if self in context.active_steps:
             context.active_steps.remove(self)
 
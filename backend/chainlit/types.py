@@ -27,6 +27,25 @@ class ThreadDict(TypedDict):
     elements: Optional[List["ElementDict"]]
 
 
+class PageInfoDict(TypedDict):
+    hasNextPage: bool
+    endCursor: Optional[str]
+
+
+class ThreadPageDict(TypedDict):
+    """Steps of a thread, loaded page by page from the most recent ones."""
+
+    steps: List["StepDict"]
+    elements: List["ElementDict"]
+    pageInfo: PageInfoDict
+
+
+class PagedThreadDict(ThreadDict):
+    """Thread holding the most recent page of its steps, as resumed."""
+
+    pageInfo: PageInfoDict
+
+
 class Pagination(BaseModel):
     first: int
     cursor: Optional[str] = None
@@ -78,6 +97,8 @@ class FileDict(TypedDict):
     path: str
     size: int
     type: str
+    # SHA-256 of the content, when known
+    hash: Optional[str]
 
 
 class UIMessagePayload(TypedDict):
@@ -0,0 +1,57 @@
+import click
+from interview.db import DATABASE_PATH_ENV, DEFAULT_DATABASE_PATH, Database
+from interview.migrations import migrate, read_seed_file, seed, seed_defaults
+
+database_option = click.option(
+    "--database",
+    default=DEFAULT_DATABASE_PATH,
+    envvar=DATABASE_PATH_ENV,
+    show_default=True,
+    help=f"Path to the SQLite database, the app reads it from {DATABASE_PATH_ENV}",
+)
+
+
+@click.group("db")
+def db_cli():
+    """Manage the interview scenarios database."""
+
+
+@db_cli.command("migrate")
+@database_option
+@click.option(
+    "--no-defaults",
+    default=False,
+    is_flag=True,
+    help="Do not insert the built-in sample scenarios",
+)
+def db_migrate(database, no_defaults):
+    """Apply the pending schema migrations."""
+    db = Database(database)
+    version = migrate(db)
+    click.echo(f"Database {database} is at schema version {version}")
+    if not no_defaults:
+        inserted = seed_defaults(db)
+        click.echo(f"Checked {inserted} built-in scenarios")
+    db.close()
+
+
+@db_cli.command("seed")
+@click.argument("file", type=click.Path(exists=True, dir_okay=False))
+@database_option
+@click.option(
+    "--keep-existing",
+    default=False,
+    is_flag=True,
+    help="Leave the scenarios with an existing id untouched instead of updating them",
+)
+def db_seed(file, database, keep_existing):
+    """Bulk load scenarios from a CSV or JSON FILE in one transaction."""
+    db = Database(database)
+    migrate(db)
+    try:
+        count = seed(db, read_seed_file(file), update=not keep_existing)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="FILE")
+    finally:
+        db.close()
+    click.echo(f"Loaded {count} scenarios into {database}")
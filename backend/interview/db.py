@@ -0,0 +1,139 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+from chainlit.sync import make_async
+
+DEFAULT_DATABASE_PATH = "app.db"
+# Environment variable overriding the database path, for the app and the CLI
+DATABASE_PATH_ENV = "INTERVIEW_DATABASE"
+
+T = TypeVar("T")
+
+
+def get_database_path() -> str:
+    return os.environ.get(DATABASE_PATH_ENV) or DEFAULT_DATABASE_PATH
+
+
+class Database:
+    """
+    Small thread safe SQLite connection pool.
+
+    Connections are opened lazily (up to pool_size), configured once for concurrent
+    reads (WAL journal) and reused, so their statement cache keeps the queries
+    prepared. The async methods run the queries in a worker thread to keep the
+    event loop free. Write listeners are notified after every committed write,
+    which is how read caches get invalidated.
+    """
+
+    def __init__(self, path: str = DEFAULT_DATABASE_PATH, pool_size: int = 4):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue(maxsize=pool_size)  # type: queue.LifoQueue
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._write_listeners = []  # type: List[Callable[[], Any]]
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, timeout=10, cached_statements=256
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection from the pool."""
+        conn = None  # type: Optional[sqlite3.Connection]
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._opened < self.pool_size:
+                    self._opened += 1
+                    try:
+                        conn = self._connect()
+                    except Exception:
+                        self._opened -= 1
+                        raise
+            if conn is None:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def on_write(self, listener: Callable[[], Any]):
+        """Register a function called after each committed write."""
+        self._write_listeners.append(listener)
+        return listener
+
+    def _notify_write(self):
+        for listener in self._write_listeners:
+            listener()
+
+    def fetchall_sync(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def execute_sync(self, sql: str, params: Sequence[Any] = ()) -> int:
+        with self.connection() as conn:
+            with conn:
+                rowcount = conn.execute(sql, params).rowcount
+        self._notify_write()
+        return rowcount
+
+    def executemany_sync(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> int:
+        """Run a statement for every set of parameters in a single transaction."""
+        with self.connection() as conn:
+            with conn:
+                rowcount = conn.executemany(sql, seq_of_params).rowcount
+        self._notify_write()
+        return rowcount
+
+    def transaction_sync(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run fn with a pooled connection inside a single transaction."""
+        with self.connection() as conn:
+            with conn:
+                result = fn(conn)
+        self._notify_write()
+        return result
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        return await make_async(self.fetchall_sync)(sql, params)
+
+    async def execute(self, sql: str, params: Sequence[Any] = ()) -> int:
+        return await make_async(self.execute_sync)(sql, params)
+
+    async def transaction(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return await make_async(self.transaction_sync)(fn)
+
+    async def executemany(
+        self, sql: str, seq_of_params: Iterable[Sequence[Any]]
+    ) -> int:
+        return await make_async(self.executemany_sync)(sql, seq_of_params)
+
+    def close(self):
+        """Close the idle connections of the pool."""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
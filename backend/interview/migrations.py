@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from chainlit.logger import logger
+from interview.db import Database
+
+# Versioned schema migrations, applied in order. The version of a database is
+# stored in its `user_version` pragma. Never edit a released migration, add a
+# new one instead.
+MIGRATIONS: List[Tuple[int, str, Sequence[str]]] = [
+    (
+        1,
+        "create scenarios table",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS scenarios (
+                id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL,
+                description TEXT,
+                finished BOOLEAN NOT NULL CHECK (finished IN (0,1)),
+                progress INTEGER CHECK (progress BETWEEN 0 AND 100),
+                tags TEXT,
+                total_click_times INTEGER DEFAULT 0,
+                winning_chance REAL CHECK (winning_chance BETWEEN 0 AND 1)
+            )
+            """,
+        ],
+    ),
+    (
+        2,
+        "index scenarios on tags and finished",
+        [
+            "CREATE INDEX IF NOT EXISTS idx_scenarios_tags ON scenarios(tags)",
+            "CREATE INDEX IF NOT EXISTS idx_scenarios_finished ON scenarios(finished)",
+        ],
+    ),
+    (
+        3,
+        "create scenario_stats table",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS scenario_stats (
+                scenario_id INTEGER PRIMARY KEY REFERENCES scenarios(id),
+                interviews INTEGER NOT NULL DEFAULT 0,
+                wins INTEGER NOT NULL DEFAULT 0,
+                score_percent_sum INTEGER NOT NULL DEFAULT 0
+            )
+            """,
+        ],
+    ),
+]
+
+DEFAULT_SCENARIOS = [
+    {"id": 1, "title": "Golang工程师模拟面试", "description": "Description for scenario 1", "tags": "技术"},
+    {"id": 2, "title": "产品经理模拟面试", "description": "Description for scenario 2", "tags": "产品"},
+    {"id": 3, "title": "运维工程师模拟面试", "description": "Description for scenario 3", "tags": "技术"},
+    {"id": 4, "title": "UI模拟面试", "description": "Description for scenario 1", "tags": "设计"},
+    {"id": 5, "title": "前端模拟面试", "description": "Description for scenario 1", "tags": "技术"},
+    {"id": 6, "title": "道路工程师模拟面试", "description": "Description for scenario 1", "tags": "工程"},
+    {"id": 7, "title": "桥梁工程师模拟面试", "description": "Description for scenario 1", "tags": "工程"},
+    {"id": 8, "title": "排水工程师模拟面试", "description": "Description for scenario 1", "tags": "工程"},
+]  # fmt: skip
+
+# Seeding only touches the catalog columns, counters of existing rows are kept
+UPSERT_SCENARIO_SQL = """
+INSERT INTO scenarios (id, title, description, finished, progress, tags, total_click_times, winning_chance)
+VALUES (:id, :title, :description, :finished, 0, :tags, 0, 0)
+ON CONFLICT(id) DO UPDATE SET
+    title = excluded.title,
+    description = excluded.description,
+    finished = excluded.finished,
+    tags = excluded.tags
+"""
+INSERT_MISSING_SCENARIO_SQL = """
+INSERT OR IGNORE INTO scenarios (id, title, description, finished, progress, tags, total_click_times, winning_chance)
+VALUES (:id, :title, :description, :finished, 0, :tags, 0, 0)
+"""
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(db: Database) -> int:
+    """Apply the pending migrations, each one in its own transaction. Return the schema version."""
+
+    with db.connection() as conn:
+        version = get_schema_version(conn)
+        for migration_version, name, statements in MIGRATIONS:
+            if migration_version <= version:
+                continue
+            logger.info(f"Applying migration {migration_version}: {name}")
+            with conn:
+                # DDL does not open a transaction implicitly
+                conn.execute("BEGIN")
+                for statement in statements:
+                    conn.execute(statement)
+                # user_version is part of the database header, it is rolled back with the transaction
+                conn.execute(f"PRAGMA user_version = {migration_version}")
+            version = migration_version
+        return version
+
+
+def normalize_scenario(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate and convert a scenario read from a seed file."""
+    title = (raw.get("title") or "").strip()
+    if not title:
+        raise ValueError(f"Scenario without title: {raw}")
+    scenario_id = raw.get("id")
+    finished = raw.get("finished") or False
+    if isinstance(finished, str):
+        finished = finished.strip().lower() in ("1", "true", "yes")
+    return {
+        "id": int(scenario_id) if scenario_id not in (None, "") else None,
+        "title": title,
+        "description": raw.get("description") or "",
+        "finished": int(bool(finished)),
+        "tags": raw.get("tags") or "",
+    }
+
+
+def read_seed_file(path: str) -> List[Dict[str, Any]]:
+    """Read scenarios from a CSV (with a header row) or a JSON array file."""
+    _, extension = os.path.splitext(path)
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if extension.lower() == ".json":
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise ValueError(
+                    "The JSON seed file must contain an array of scenarios"
+                )
+        elif extension.lower() == ".csv":
+            rows = list(csv.DictReader(f))
+        else:
+            raise ValueError(f"Unsupported seed file type: {extension}")
+    return rows
+
+
+def seed(db: Database, scenarios: Iterable[Dict[str, Any]], update=True) -> int:
+    """
+    Load scenarios in a single transaction. Idempotent: existing ids are updated
+    (or left untouched if update is False) instead of failing.
+    """
+    rows = [normalize_scenario(scenario) for scenario in scenarios]
+    sql = UPSERT_SCENARIO_SQL if update else INSERT_MISSING_SCENARIO_SQL
+    db.transaction_sync(lambda conn: conn.executemany(sql, rows))
+    return len(rows)
+
+
+def seed_defaults(db: Database) -> int:
+    """Insert the built-in sample scenarios that are missing."""
+    return seed(db, DEFAULT_SCENARIOS, update=False)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Optional, Tuple, TypeVar
+
+from chainlit.logger import logger
+
+T = TypeVar("T")
+
+
+class TurnTimings:
+    """Wall clock duration (in seconds) of each stage of an interview turn."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.stages = {}  # type: Dict[str, float]
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - start
+
+    async def measure(self, name: str, coro: Awaitable[T]) -> T:
+        with self.stage(name):
+            return await coro
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            **{name: round(value * 1000) for name, value in self.stages.items()},
+            "total": round(self.total * 1000),
+        }
+
+    def __str__(self):
+        return ", ".join(f"{name}={ms}ms" for name, ms in self.to_dict().items())
+
+
+async def run_turn(
+    reply: Awaitable[Any],
+    grade: Awaitable[T],
+    timings: Optional[TurnTimings] = None,
+) -> Tuple[Optional[T], TurnTimings]:
+    """
+    Run the interviewer reply and the grading of the user answer concurrently.
+
+    Grading only depends on the user answer, so it is started before the reply is
+    streamed instead of after it. A grading failure is logged and does not affect
+    the reply, in which case None is returned as the grade.
+    """
+    timings = timings or TurnTimings()
+    grading = asyncio.create_task(timings.measure("grade", grade))
+
+    try:
+        await timings.measure("reply", reply)
+    except BaseException:
+        grading.cancel()
+        raise
+
+    try:
+        grade_result = await grading  # type: Optional[T]
+    except Exception as e:
+        logger.error(f"Failed to grade the answer: {e}")
+        grade_result = None
+
+    return grade_result, timings
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import tomli
+from chainlit.logger import logger
+
+DEFAULT_PROMPTS_FILE = os.path.join(os.path.dirname(__file__), "prompts.toml")
+DIFFICULTY_PLACEHOLDER = "{difficulty}"
+
+
+class ScenarioPrompts(NamedTuple):
+    prompt: str
+    grade_prompt: str
+
+
+class PromptRegistry:
+    """
+    Interview prompts, compiled once per (scenario, difficulty).
+
+    Resolving the prompts of a turn is a dict lookup. The source file is checked
+    for modifications at most every `check_interval` seconds and reloaded when it
+    changed, so scenarios can be added or edited without a redeploy.
+    """
+
+    def __init__(self, path: str = DEFAULT_PROMPTS_FILE, check_interval: float = 2):
+        self.path = path
+        self.check_interval = check_interval
+        self.default_difficulty = ""
+        self._compiled = {}  # type: Dict[Tuple[str, str], ScenarioPrompts]
+        self._mtime = None  # type: Optional[float]
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """Load and compile the prompts file."""
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path, "rb") as f:
+                data = tomli.load(f)
+
+            difficulties = data.get("difficulties", {})  # type: Dict[str, str]
+            compiled = {}
+            for scenario_id, templates in data.get("scenarios", {}).items():
+                for difficulty, label in difficulties.items():
+                    compiled[(str(scenario_id), difficulty)] = ScenarioPrompts(
+                        prompt=templates["prompt"].replace(
+                            DIFFICULTY_PLACEHOLDER, label
+                        ),
+                        grade_prompt=templates["grade_prompt"].replace(
+                            DIFFICULTY_PLACEHOLDER, label
+                        ),
+                    )
+
+            # Swap the whole table at once so readers never see a partial reload
+            self._compiled = compiled
+            self.default_difficulty = data.get("default_difficulty", "")
+            self._mtime = mtime
+            self._next_check = time.monotonic() + self.check_interval
+            logger.info(f"Loaded {len(compiled)} interview prompts from {self.path}")
+
+    def _reload_if_modified(self):
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        try:
+            if os.stat(self.path).st_mtime != self._mtime:
+                self.reload()
+        except Exception as e:
+            # Keep serving the previous prompts if the new file is invalid
+            logger.error(f"Error reloading interview prompts: {e}")
+
+    def get(self, scenario_id, difficulty: Optional[str]) -> Optional[ScenarioPrompts]:
+        """Return the prompts of a scenario, or None if the scenario is unknown."""
+        self._reload_if_modified()
+        compiled = self._compiled
+        key = (str(scenario_id), difficulty or self.default_difficulty)
+        return compiled.get(key) or compiled.get((key[0], self.default_difficulty))
@@ -0,0 +1,84 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterator
+
+# Marks the end of a stream produced by the worker thread
+_STREAM_END = object()
+
+
+def chunk_text(chunk: Any) -> str:
+    """Extract the text of a Gemini response (or response chunk)."""
+    try:
+        return chunk.candidates[0].content.parts[0].text
+    except (AttributeError, IndexError):
+        return ""
+
+
+class GeminiProvider:
+    """
+    Async adapter around the synchronous google.generativeai client.
+
+    The blocking HTTP calls and the iteration over the streamed response run in a
+    worker thread, chunks are handed over to the event loop through a queue so that
+    other websocket sessions keep being served while an answer is generated.
+
+    A worker thread is held for a whole generation, so the streams get their own
+    bounded pool instead of the default executor used by make_async and the data
+    layers: past `max_concurrent_streams`, new answers wait for a free thread.
+    """
+
+    def __init__(
+        self, model: Any, max_buffered_chunks: int = 64, max_concurrent_streams=8
+    ):
+        self.model = model
+        self.max_buffered_chunks = max_buffered_chunks
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrent_streams, thread_name_prefix="gemini-stream"
+        )
+
+    async def stream(self, contents: str, **kwargs) -> AsyncIterator[str]:
+        """Stream the answer tokens without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.max_buffered_chunks)  # type: asyncio.Queue
+        cancelled = threading.Event()
+
+        def put(item):
+            # Block the worker thread (not the loop) when the consumer is slower
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while not cancelled.is_set():
+                try:
+                    return future.result(timeout=0.1)
+                except concurrent.futures.TimeoutError:
+                    continue
+            future.cancel()
+
+        def produce():
+            try:
+                response = self.model.generate_content(
+                    contents=contents, stream=True, **kwargs
+                )
+                for chunk in response:
+                    if cancelled.is_set():
+                        break
+                    if text := chunk_text(chunk):
+                        put(text)
+            except Exception as e:
+                put(e)
+            finally:
+                if not cancelled.is_set():
+                    put(_STREAM_END)
+
+        loop.run_in_executor(self.executor, produce)
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Stops the worker thread if the consumer gave up early
+            cancelled.set()
@@ -0,0 +1,75 @@
+import json
+import time
+from typing import List, Optional
+
+from interview.db import Database
+from pydantic import BaseModel
+
+SCENARIO_COLUMNS = (
+    "id",
+    "title",
+    "description",
+    "finished",
+    "progress",
+    "tags",
+    "total_click_times",
+    "winning_chance",
+)
+LIST_SCENARIOS_SQL = f"SELECT {', '.join(SCENARIO_COLUMNS)} FROM scenarios ORDER BY id"
+
+
+class Scenario(BaseModel):
+    id: int
+    title: str
+    description: str
+    finished: bool
+    progress: int
+    tags: str
+    total_click_times: int
+    winning_chance: float
+
+
+class ScenarioRepository:
+    """
+    Read access to the scenarios table with an in-process cache.
+
+    The scenario list is cached both as models and as a serialized JSON body.
+    The cache is dropped after every write made through the database and after
+    `ttl` seconds, to pick up writes made by other processes.
+    """
+
+    def __init__(self, db: Database, ttl: float = 30):
+        self.db = db
+        self.ttl = ttl
+        self._scenarios = None  # type: Optional[List[Scenario]]
+        self._json = None  # type: Optional[bytes]
+        self._expires_at = 0.0
+        db.on_write(self.invalidate)
+
+    def invalidate(self):
+        self._scenarios = None
+        self._json = None
+
+    async def list(self) -> List[Scenario]:
+        scenarios = self._scenarios
+        if scenarios is not None and time.monotonic() < self._expires_at:
+            return scenarios
+
+        rows = await self.db.fetchall(LIST_SCENARIOS_SQL)
+        scenarios = [Scenario(**dict(row)) for row in rows]
+        self._scenarios = scenarios
+        self._json = None
+        self._expires_at = time.monotonic() + self.ttl
+        return scenarios
+
+    async def list_json(self) -> bytes:
+        """Return the scenario list serialized as a JSON array."""
+        scenarios = await self.list()
+        body = self._json
+        if body is None or scenarios is not self._scenarios:
+            body = json.dumps(
+                [scenario.dict() for scenario in scenarios], ensure_ascii=False
+            ).encode("utf-8")
+            if scenarios is self._scenarios:
+                self._json = body
+        return body
@@ -0,0 +1,78 @@
+import re
+from typing import Callable, List, Optional, Tuple
+
+# Longer numbers inside brackets are not scores (and int() of a huge string is slow)
+MAX_SCORE_DIGITS = 9
+# A score is written as [n] in the grading reply, the last one wins
+SCORE_PATTERN = re.compile(r"\[(\d{1,%d})\]" % MAX_SCORE_DIGITS)
+# Start of a bracket which may be completed by the next token
+PARTIAL_SCORE_PATTERN = re.compile(r"\[\d{0,%d}\Z" % MAX_SCORE_DIGITS)
+
+
+class ScoreParser:
+    """
+    Incremental parser for the score of a grading reply.
+
+    Tokens are fed as they are streamed. Each token is scanned once, together
+    with the few characters of a bracket left open by the previous token, so
+    parsing is linear in the length of the reply whatever the number of
+    brackets. `feed` returns the score as soon as a new `[n]` is complete: it
+    is provisional until the reply ends, since a later bracket replaces it.
+    """
+
+    def __init__(self, on_score: Optional[Callable[[int], None]] = None):
+        self.on_score = on_score
+        self.score = None  # type: Optional[int]
+        self._chunks = []  # type: List[str]
+        self._length = 0
+        # Offset of the last score bracket in the text
+        self._score_start = -1
+        # Unterminated bracket at the end of the text, like "[1"
+        self._carry = ""
+
+    def feed(self, chunk: str) -> Optional[int]:
+        """Consume a token. Return the new provisional score if the token completed one."""
+        if not chunk:
+            return None
+        buffer = self._carry + chunk
+        offset = self._length - len(self._carry)
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        last = None
+        for last in SCORE_PATTERN.finditer(buffer):
+            pass
+
+        self._carry = ""
+        bracket = buffer.rfind("[")
+        if bracket >= 0 and PARTIAL_SCORE_PATTERN.match(buffer, bracket):
+            self._carry = buffer[bracket:]
+
+        if last is None:
+            return None
+        score = int(last.group(1))
+        self.score = score
+        self._score_start = offset + last.start()
+        if self.on_score:
+            self.on_score(score)
+        return score
+
+    @property
+    def text(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def result(self) -> Tuple[Optional[int], str]:
+        """Return the last score and the text preceding it (the whole text if there is no score)."""
+        text = self.text
+        if self.score is None:
+            return None, text
+        return self.score, text[: self._score_start]
+
+
+def extract_score(text: str) -> Tuple[Optional[int], str]:
+    """Return the last [n] score of a complete reply and the text preceding it."""
+    parser = ScoreParser()
+    parser.feed(text)
+    return parser.result()
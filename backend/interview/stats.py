@@ -0,0 +1,195 @@
+import asyncio
+import sqlite3
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from chainlit.logger import logger
+from interview.db import Database
+
+LOAD_STATS_SQL = """
+SELECT s.id, s.total_click_times, st.interviews, st.wins, st.score_percent_sum
+FROM scenarios s LEFT JOIN scenario_stats st ON st.scenario_id = s.id
+"""
+
+INCREMENT_CLICKS_SQL = (
+    "UPDATE scenarios SET total_click_times = total_click_times + ? WHERE id = ?"
+)
+
+UPSERT_STATS_SQL = """
+INSERT INTO scenario_stats (scenario_id, interviews, wins, score_percent_sum)
+VALUES (?, ?, ?, ?)
+ON CONFLICT(scenario_id) DO UPDATE SET
+    interviews = interviews + excluded.interviews,
+    wins = wins + excluded.wins,
+    score_percent_sum = score_percent_sum + excluded.score_percent_sum
+"""
+
+# Derive the scenarios columns from the aggregated stats
+REFRESH_SCENARIO_SQL = """
+UPDATE scenarios SET
+    winning_chance = (
+        SELECT CAST(wins AS REAL) / interviews FROM scenario_stats
+        WHERE scenario_id = scenarios.id
+    ),
+    progress = (
+        SELECT score_percent_sum / interviews FROM scenario_stats
+        WHERE scenario_id = scenarios.id
+    )
+WHERE id = ?
+"""
+
+
+@dataclass
+class ScenarioCounters:
+    clicks: int = 0
+    interviews: int = 0
+    wins: int = 0
+    score_percent_sum: int = 0
+
+    @property
+    def winning_chance(self) -> float:
+        return self.wins / self.interviews if self.interviews else 0.0
+
+    @property
+    def progress(self) -> int:
+        return self.score_percent_sum // self.interviews if self.interviews else 0
+
+    def to_dict(self) -> Dict:
+        return {
+            **asdict(self),
+            "winning_chance": self.winning_chance,
+            "progress": self.progress,
+        }
+
+
+class ScenarioStats:
+    """
+    Batched counters for the scenarios table.
+
+    Clicks and interview outcomes are accumulated in memory and flushed to the
+    database every `flush_interval` seconds in a single transaction, instead of
+    one write (and one SQLite writer lock) per event. Totals are kept in memory
+    as well, so reading the aggregated stats never hits the database.
+
+    The stored totals are loaded in the background on first use, the pending
+    counters must be flushed with close() when the app shuts down.
+    """
+
+    def __init__(self, db: Database, flush_interval: float = 5):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._totals: Dict[int, ScenarioCounters] = defaultdict(ScenarioCounters)
+        self._pending: Dict[int, ScenarioCounters] = defaultdict(ScenarioCounters)
+        self._flush_task = None  # type: Optional[asyncio.Task]
+        self._load_task = None  # type: Optional[asyncio.Task]
+
+    async def _load(self):
+        # The scenario_stats table is created by the migrations
+        try:
+            rows = await self.db.fetchall(LOAD_STATS_SQL)
+        except Exception as e:
+            logger.error(f"Error loading scenario stats: {e}")
+            return
+        for row in rows:
+            # Added to the events counted while loading, none is flushed yet
+            counters = self._totals[row[0]]
+            counters.clicks += row[1] or 0
+            counters.interviews += row[2] or 0
+            counters.wins += row[3] or 0
+            counters.score_percent_sum += row[4] or 0
+
+    def _ensure_started(self):
+        if self._load_task is None:
+            self._load_task = asyncio.create_task(self._load())
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_periodically())
+
+    async def wait_loaded(self):
+        """Wait for the stored totals, so all() and get() include them."""
+        self._ensure_started()
+        await asyncio.shield(self._load_task)
+
+    def _parse_id(self, scenario_id) -> Optional[int]:
+        try:
+            return int(scenario_id)
+        except (TypeError, ValueError):
+            # Scenarios added to prompts.toml are not necessarily in the table
+            logger.warning(f"Ignoring stats of invalid scenario id {scenario_id!r}")
+            return None
+
+    def record_click(self, scenario_id):
+        """Count a scenario being opened."""
+        if (scenario_id := self._parse_id(scenario_id)) is None:
+            return
+        self._ensure_started()
+        self._pending[scenario_id].clicks += 1
+        self._totals[scenario_id].clicks += 1
+
+    def record_outcome(self, scenario_id, won: bool, score_percent: int):
+        """Count a finished interview and its result."""
+        if (scenario_id := self._parse_id(scenario_id)) is None:
+            return
+        self._ensure_started()
+        score_percent = max(0, min(100, int(score_percent)))
+        for counters in (self._pending[scenario_id], self._totals[scenario_id]):
+            counters.interviews += 1
+            counters.wins += int(won)
+            counters.score_percent_sum += score_percent
+
+    def get(self, scenario_id) -> ScenarioCounters:
+        """Return the aggregated counters of a scenario, including unflushed events."""
+        try:
+            return self._totals.get(int(scenario_id)) or ScenarioCounters()
+        except (TypeError, ValueError):
+            return ScenarioCounters()
+
+    def all(self) -> Dict[int, ScenarioCounters]:
+        return dict(self._totals)
+
+    async def flush(self):
+        """Write the pending counters in one transaction."""
+        if not self._pending:
+            return
+        if self._load_task is not None:
+            # The loaded totals must not include the events flushed below
+            await asyncio.shield(self._load_task)
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, defaultdict(ScenarioCounters)
+
+        def write(conn: sqlite3.Connection):
+            conn.executemany(
+                INCREMENT_CLICKS_SQL,
+                [(c.clicks, id) for id, c in pending.items() if c.clicks],
+            )
+            outcomes = [(id, c) for id, c in pending.items() if c.interviews]
+            conn.executemany(
+                UPSERT_STATS_SQL,
+                [(id, c.interviews, c.wins, c.score_percent_sum) for id, c in outcomes],
+            )
+            conn.executemany(REFRESH_SCENARIO_SQL, [(id,) for id, _ in outcomes])
+
+        try:
+            await self.db.transaction(write)
+        except Exception as e:
+            logger.error(f"Error flushing scenario stats: {e}")
+            # Put the counters back, they will be part of the next flush
+            for id, c in pending.items():
+                merged = self._pending[id]
+                merged.clicks += c.clicks
+                merged.interviews += c.interviews
+                merged.wins += c.wins
+                merged.score_percent_sum += c.score_percent_sum
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        """Stop the periodic flush and write the pending counters."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
@@ -0,0 +1,137 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Literal, Optional
+
+Role = Literal["system", "user", "assistant"]
+
+# Prefix used when the transcript is rendered as plain text (Gemini prompt, grading history)
+ROLE_PREFIXES: Dict[str, str] = {
+    "system": "System: ",
+    "user": "User: ",
+    "assistant": "System: ",
+}
+
+# Number of turns kept in memory. Older turns are dropped, only their count is kept.
+DEFAULT_MAX_TURNS = 120
+# Token budget used when rendering the history into a prompt
+DEFAULT_TOKEN_BUDGET = 6000
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimation (~4 utf-8 bytes per token), good enough for windowing."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+@dataclass
+class Turn:
+    role: Role
+    content: str
+    round: Optional[int] = None
+    score: Optional[int] = None
+    # Rendered text line and its token estimate, computed once when the turn is appended
+    rendered: str = ""
+    tokens: int = 0
+
+
+class Transcript:
+    """
+    Append-only conversation history of an interview session.
+
+    Every turn is rendered once when appended, so building a prompt only walks the
+    turns that fit in the token budget instead of copying the whole history string.
+    The number of turns kept in memory is bounded by max_turns.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str = "",
+        max_turns: int = DEFAULT_MAX_TURNS,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+    ):
+        self.turns = deque(maxlen=max_turns)  # type: Deque[Turn]
+        self.token_budget = token_budget
+        # Total number of turns ever appended, including the evicted ones
+        self.total_turns = 0
+        self._render_cache = {}  # type: Dict[int, str]
+        self.system_turn = None  # type: Optional[Turn]
+        self.set_system_prompt(system_prompt)
+
+    def __len__(self):
+        return self.total_turns
+
+    def _render_turn(self, turn: Turn):
+        turn.rendered = ROLE_PREFIXES[turn.role] + turn.content + "\n"
+        turn.tokens = estimate_tokens(turn.rendered)
+
+    def set_system_prompt(self, prompt: str):
+        """Set the system prompt, always rendered first regardless of the budget."""
+        if prompt:
+            self.system_turn = Turn(role="system", content=prompt)
+            self._render_turn(self.system_turn)
+        else:
+            self.system_turn = None
+        self._render_cache.clear()
+
+    def append(
+        self,
+        role: Role,
+        content: str,
+        round: Optional[int] = None,
+        score: Optional[int] = None,
+    ) -> Turn:
+        """Append a new turn. Costs O(len(content))."""
+        turn = Turn(role=role, content=content or "", round=round, score=score)
+        self._render_turn(turn)
+        self.turns.append(turn)
+        self.total_turns += 1
+        self._render_cache.clear()
+        return turn
+
+    def last(self, role: Optional[Role] = None) -> Optional[Turn]:
+        """Return the most recent turn, optionally of a given role."""
+        for turn in reversed(self.turns):
+            if role is None or turn.role == role:
+                return turn
+        return None
+
+    def window(self, token_budget: Optional[int] = None) -> List[Turn]:
+        """Return the most recent turns fitting in the token budget, oldest first."""
+        budget = self.token_budget if token_budget is None else token_budget
+        if self.system_turn:
+            budget -= self.system_turn.tokens
+
+        selected = []  # type: List[Turn]
+        for turn in reversed(self.turns):
+            if turn.tokens > budget and selected:
+                break
+            budget -= turn.tokens
+            selected.append(turn)
+        selected.reverse()
+        return selected
+
+    def render(self, token_budget: Optional[int] = None) -> str:
+        """Render the windowed history as plain text. Cached until the next append."""
+        budget = self.token_budget if token_budget is None else token_budget
+        if budget in self._render_cache:
+            return self._render_cache[budget]
+
+        parts = [self.system_turn.rendered] if self.system_turn else []
+        parts.extend(turn.rendered for turn in self.window(budget))
+        rendered = "\n".join(parts)
+
+        # Only a couple of budgets are used per session, keep the cache tiny
+        if len(self._render_cache) >= 4:
+            self._render_cache.clear()
+        self._render_cache[budget] = rendered
+        return rendered
+
+    def to_messages(self, token_budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """Return the windowed history in the OpenAI chat messages format."""
+        messages = []
+        if self.system_turn:
+            messages.append({"role": "system", "content": self.system_turn.content})
+        messages.extend(
+            {"role": turn.role, "content": turn.content}
+            for turn in self.window(token_budget)
+        )
+        return messages
@@ -0,0 +1,114 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+from chainlit.http_cache import conditional_file_response, parse_range
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+
+def serve(path):
+    async def endpoint(request):
+        return conditional_file_response(request, path, "application/octet-stream")
+
+    return Starlette(routes=[Route("/file", endpoint)])
+
+
+def get(path, headers=None):
+    async def request():
+        transport = httpx.ASGITransport(app=serve(path))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await c.get("/file", headers=headers or {})
+
+    return asyncio.run(request())
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    path = tmp_path / "large.bin"
+    path.write_bytes(os.urandom(1024 * 1024 + 17))
+    return path
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=500-5000", 1000) == (500, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    # Multiple ranges are not supported, the whole file is sent
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+
+
+@pytest.mark.parametrize(
+    "range_header,size",
+    [("bytes=1000-", 1000), ("bytes=5-1", 1000), ("bytes=-0", 1000), ("bytes=-10", 0)],
+)
+def test_parse_unsatisfiable_range(range_header, size):
+    with pytest.raises(ValueError):
+        parse_range(range_header, size)
+
+
+def test_whole_file(large_file):
+    response = get(large_file)
+
+    assert response.status_code == 200
+    assert response.content == large_file.read_bytes()
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["etag"]
+
+
+def test_range_request(large_file):
+    content = large_file.read_bytes()
+    response = get(large_file, {"Range": "bytes=1000-524287"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 1000-524287/{len(content)}"
+    assert response.headers["content-length"] == str(524287 - 1000 + 1)
+    assert len(response.content) == 524287 - 1000 + 1
+    assert response.content == content[1000:524288]
+
+
+def test_suffix_range_request(large_file):
+    content = large_file.read_bytes()
+    response = get(large_file, {"Range": "bytes=-100"})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == (
+        f"bytes {len(content) - 100}-{len(content) - 1}/{len(content)}"
+    )
+    assert response.content == content[-100:]
+
+
+def test_matching_etag_is_not_modified(large_file):
+    etag = get(large_file).headers["etag"]
+    response = get(large_file, {"If-None-Match": etag, "Range": "bytes=0-9"})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_if_range_sends_whole_file(large_file):
+    response = get(large_file, {"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert response.status_code == 200
+    assert len(response.content) == large_file.stat().st_size
+
+
+def test_unsatisfiable_range(large_file):
+    size = large_file.stat().st_size
+    response = get(large_file, {"Range": f"bytes={size}-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
+
+
+def test_range_of_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    response = get(path, {"Range": "bytes=-10"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */0"
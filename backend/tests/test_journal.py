@@ -0,0 +1,199 @@
+import asyncio
+from types import SimpleNamespace
+
+from chainlit.journal import PersistenceJournal
+
+
+class RecordingDataLayer:
+    """Data layer recording the writes replayed by the journal."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = None
+
+    async def create_step(self, step_dict):
+        self.calls.append(("create_step", step_dict["id"], step_dict.get("output")))
+
+    async def update_step(self, step_dict):
+        if self.release:
+            # Keep the write in flight until the test releases it
+            await self.release.wait()
+        self.calls.append(("update_step", step_dict["id"], step_dict.get("output")))
+
+    async def delete_step(self, step_id):
+        self.calls.append(("delete_step", step_id, None))
+
+    async def create_element(self, element):
+        self.calls.append(("create_element", element.id, element.for_id))
+
+    async def delete_element(self, element_id):
+        self.calls.append(("delete_element", element_id, None))
+
+    async def update_thread(self, thread_id, name=None):
+        self.calls.append(("update_thread", thread_id, name))
+
+
+def record(journal, data_layer, name, *args):
+    journal.record(getattr(RecordingDataLayer, name), data_layer, args, {})
+
+
+def step(id, output=None):
+    return {"id": id, "output": output}
+
+
+def test_replays_writes_in_order():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "update_thread", "t1", "Thread")
+    record(journal, data_layer, "create_step", step("s1"))
+    record(journal, data_layer, "create_step", step("s2"))
+    record(journal, data_layer, "delete_step", "s0")
+
+    asyncio.run(journal.flush())
+
+    assert data_layer.calls == [
+        ("update_thread", "t1", "Thread"),
+        ("create_step", "s1", None),
+        ("create_step", "s2", None),
+        ("delete_step", "s0", None),
+    ]
+    assert len(journal) == 0
+
+
+def test_update_is_folded_into_pending_create():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "create_step", step("s1"))
+    record(journal, data_layer, "create_step", step("s2"))
+    record(journal, data_layer, "update_step", step("s1", "a"))
+    record(journal, data_layer, "update_step", step("s1", "ab"))
+
+    assert len(journal) == 2
+    asyncio.run(journal.flush())
+
+    # The create keeps its position and takes the last state
+    assert data_layer.calls == [
+        ("create_step", "s1", "ab"),
+        ("create_step", "s2", None),
+    ]
+
+
+def test_successive_updates_are_folded():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "update_step", step("s1", "a"))
+    record(journal, data_layer, "update_step", step("s1", "ab"))
+    record(journal, data_layer, "update_step", step("s1", "abc"))
+
+    assert len(journal) == 1
+    asyncio.run(journal.flush())
+
+    assert data_layer.calls == [("update_step", "s1", "abc")]
+
+
+def test_create_update_delete_drops_all_writes():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "create_step", step("s1"))
+    record(journal, data_layer, "update_step", step("s1", "a"))
+    record(journal, data_layer, "create_step", step("s2"))
+    record(journal, data_layer, "delete_step", "s1")
+
+    asyncio.run(journal.flush())
+
+    # Never persisted, nothing to delete
+    assert data_layer.calls == [("create_step", "s2", None)]
+
+
+def test_delete_of_persisted_step_drops_its_updates():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "update_step", step("s1", "a"))
+    record(journal, data_layer, "delete_step", "s1")
+
+    asyncio.run(journal.flush())
+
+    assert data_layer.calls == [("delete_step", "s1", None)]
+
+
+def test_update_after_delete_is_kept():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "delete_step", "s1")
+    record(journal, data_layer, "update_step", step("s1", "a"))
+
+    asyncio.run(journal.flush())
+
+    assert data_layer.calls == [
+        ("delete_step", "s1", None),
+        ("update_step", "s1", "a"),
+    ]
+
+
+def test_delete_step_drops_pending_element_creations():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "create_step", step("s1"))
+    record(journal, data_layer, "create_element", SimpleNamespace(id="e1", for_id="s1"))
+    record(journal, data_layer, "create_element", SimpleNamespace(id="e2", for_id="s2"))
+    record(journal, data_layer, "delete_step", "s1")
+
+    asyncio.run(journal.flush())
+
+    assert data_layer.calls == [("create_element", "e2", "s2")]
+
+
+def test_delete_element_pending_creation():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "create_element", SimpleNamespace(id="e1", for_id="s1"))
+    record(journal, data_layer, "delete_element", "e1")
+
+    assert len(journal) == 0
+
+
+def test_oldest_writes_are_dropped_when_full():
+    journal, data_layer = PersistenceJournal(max_entries=2), RecordingDataLayer()
+    for id in ("s1", "s2", "s3"):
+        record(journal, data_layer, "create_step", step(id))
+
+    assert journal.dropped == 1
+    asyncio.run(journal.flush())
+
+    assert data_layer.calls == [
+        ("create_step", "s2", None),
+        ("create_step", "s3", None),
+    ]
+
+
+def test_clear_drops_writes_without_interaction():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+    record(journal, data_layer, "create_step", step("s1"))
+    record(journal, data_layer, "update_thread", "t1", "Thread")
+
+    # The session ends before the first user message
+    journal.clear()
+    asyncio.run(journal.flush())
+
+    assert len(journal) == 0
+    assert not journal.active
+    assert data_layer.calls == []
+
+
+def test_stays_active_while_last_write_is_in_flight():
+    journal, data_layer = PersistenceJournal(), RecordingDataLayer()
+
+    async def scenario():
+        data_layer.release = asyncio.Event()
+        record(journal, data_layer, "update_step", step("s1", "a"))
+        flush = asyncio.create_task(journal.flush())
+        await asyncio.sleep(0)
+
+        # The last entry left the journal but is not written yet
+        assert len(journal) == 0
+        assert journal.active
+        # So a concurrent write is journaled behind it
+        record(journal, data_layer, "create_step", step("s2"))
+
+        data_layer.release.set()
+        await flush
+        assert not journal.active
+
+    asyncio.run(scenario())
+
+    assert data_layer.calls == [
+        ("update_step", "s1", "a"),
+        ("create_step", "s2", None),
+    ]
@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+from chainlit.context import context_var
+from chainlit.data.persistence import PersistenceQueue
+
+
+def in_session(session_id):
+    context_var.set(SimpleNamespace(session=SimpleNamespace(id=session_id)))
+
+
+def test_sessions_are_written_in_parallel_and_in_order():
+    queue = PersistenceQueue(max_size=2, timeout=0.2, max_retries=0)
+    writes = []
+
+    async def write(session_id, index):
+        await asyncio.sleep(0.01)
+        writes.append((session_id, index))
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def produce(session_id, slow=False):
+        in_session(session_id)
+        if slow:
+            await queue.put("hanging write", hang)
+        for index in range(5):
+            await queue.put("write", write, session_id, index)
+
+    async def scenario():
+        producers = asyncio.gather(produce("slow", slow=True), produce("fast"))
+        # The fast session is not held back by the hanging write
+        await asyncio.sleep(0.15)
+        assert [i for s, i in writes if s == "fast"] == list(range(5))
+        assert not [i for s, i in writes if s == "slow"]
+        await producers
+        await queue.join(timeout=2)
+
+    asyncio.run(scenario())
+
+    assert [i for s, i in writes if s == "slow"] == list(range(5))
+    assert queue.metrics.timeouts == 1
+    assert queue.metrics.failed == 1
+    assert queue.metrics.processed == 10
+    assert len(queue) == 0
+
+
+def test_pending_update_is_coalesced():
+    queue = PersistenceQueue()
+    writes = []
+
+    async def write(value):
+        writes.append(value)
+
+    async def scenario():
+        in_session("s1")
+        await queue.put("block", asyncio.sleep, 0.05)
+        for value in ("a", "ab", "abc"):
+            await queue.put("update", write, value, key="step", coalesce=True)
+        await queue.join(timeout=1)
+
+    asyncio.run(scenario())
+
+    assert writes == ["abc"]
+    assert queue.metrics.coalesced == 2
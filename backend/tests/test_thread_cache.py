@@ -0,0 +1,47 @@
+from chainlit.data.thread_cache import ThreadCache
+
+
+def thread(id, step_ids):
+    return {
+        "id": id,
+        "steps": [{"id": step_id} for step_id in step_ids],
+        "elements": [],
+        "user": None,
+    }
+
+
+def test_unrelated_writes_do_not_prevent_caching():
+    cache = ThreadCache()
+    token = cache.begin_read()
+    cache.invalidate("t2")
+    cache.invalidate("step-of-another-thread")
+    cache.put("t1", thread("t1", ["s1"]), token)
+
+    assert cache.get("t1") is not None
+
+
+def test_thread_written_during_read_is_not_cached():
+    cache = ThreadCache()
+    token = cache.begin_read()
+    cache.invalidate("t1")
+    cache.put("t1", thread("t1", ["s1"]), token)
+
+    assert cache.get("t1") is None
+
+
+def test_step_written_during_read_is_not_cached():
+    cache = ThreadCache()
+    token = cache.begin_read()
+    # The thread of the step is not known until the read ends
+    cache.invalidate("s1")
+    cache.put("t1", thread("t1", ["s1"]), token)
+
+    assert cache.get("t1") is None
+
+
+def test_step_write_drops_cached_thread():
+    cache = ThreadCache()
+    cache.put("t1", thread("t1", ["s1"]), cache.begin_read())
+    cache.invalidate("s1")
+
+    assert cache.get("t1") is None
@@ -0,0 +1,65 @@
+import asyncio
+
+from chainlit.data import paginate_thread_steps
+from chainlit.data.sql import SQLiteDataLayer
+from chainlit.types import Pagination
+
+# (id, parent id) in creation order, "gone" steps are not in the thread
+STEPS = [
+    ("s00", None),
+    ("s01", "s00"),
+    ("s02", "gone1"),
+    ("s03", None),
+    ("s04", "s02"),
+    ("s05", "gone2"),
+    ("s06", "s03"),
+    ("s07", None),
+    ("s08", "gone3"),
+    ("s09", "s08"),
+    ("s10", None),
+]
+
+
+async def read_pages(get_page):
+    pages, cursor = [], None
+    while True:
+        page = await get_page(Pagination(first=2, cursor=cursor))
+        pages.append(([step["id"] for step in page["steps"]], page["pageInfo"]))
+        if not page["pageInfo"]["hasNextPage"]:
+            return pages
+        cursor = page["pageInfo"]["endCursor"]
+
+
+def test_sql_and_thread_pages_match(tmp_path):
+    async def scenario():
+        data_layer = SQLiteDataLayer(str(tmp_path / "threads.db"))
+        await data_layer.update_thread("t1", name="Thread")
+        for index, (id, parent_id) in enumerate(STEPS):
+            await data_layer.step_batcher.add(
+                {
+                    "id": id,
+                    "threadId": "t1",
+                    "parentId": parent_id,
+                    "createdAt": f"2024-01-01T00:00:{index:02d}",
+                    "type": "run",
+                    "name": id,
+                    "output": "",
+                }
+            )
+
+        # Read from the database before get_thread caches the thread
+        sql_pages = await read_pages(
+            lambda pagination: data_layer.get_thread_steps("t1", pagination)
+        )
+        thread = await data_layer.get_thread("t1")
+
+        async def thread_page(pagination):
+            return paginate_thread_steps(thread, pagination)
+
+        return sql_pages, await read_pages(thread_page)
+
+    sql_pages, thread_pages = asyncio.run(scenario())
+
+    # Orphan steps are roots in both
+    assert sql_pages == thread_pages
+    assert sql_pages[0][0] == ["s08", "s09", "s10"]
@@ -3,6 +3,8 @@ import { useCallback } from 'react';
 import { useRecoilValue, useSetRecoilState } from 'recoil';
 import { toast } from 'sonner';
 
+import { Box, Button } from '@mui/material';
+
 import {
   IAction,
   IFeedback,
@@ -16,6 +18,8 @@ import {
   useChatSession
 } from '@chainlit/react-client';
 
+import { Translator } from 'components/i18n';
+
 import { apiClientState } from 'state/apiClient';
 import { IProjectSettings } from 'state/project';
 
@@ -34,8 +38,8 @@ const Messages = ({
   setAutoScroll
 }: MessagesProps): JSX.Element => {  
   const { elements, askUser, avatars, loading, actions } = useChatData();
-  const { messages } = useChatMessages();
-  const { callAction } = useChatInteract();
+  const { messages, hasOlderMessages } = useChatMessages();
+  const { callAction, loadOlderMessages } = useChatInteract();
   const { idToResume } = useChatSession();
   const accessToken = useRecoilValue(accessTokenState);
   const setMessages = useSetRecoilState(messagesState);
@@ -116,18 +120,31 @@ const Messages = ({
       latex={projectSettings?.features?.latex}
     />
   ) : (
-    <MessageContainer
-      avatars={avatars}
-      loading={loading}
-      askUser={askUser}
-      actions={actions}
-      elements={elements}
-      messages={messages}
-      autoScroll={autoScroll}
-      onFeedbackUpdated={onFeedbackUpdated}
-      callAction={callActionWithToast}
-      setAutoScroll={setAutoScroll}
-    />
+    <>
+      {hasOlderMessages ? (
+        <Box display="flex" justifyContent="center" pt={1}>
+          <Button
+            id="load-older-messages"
+            size="small"
+            onClick={() => loadOlderMessages()}
+          >
+            <Translator path="components.organisms.chat.Messages.index.loadOlderMessages" />
+          </Button>
+        </Box>
+      ) : null}
+      <MessageContainer
+        avatars={avatars}
+        loading={loading}
+        askUser={askUser}
+        actions={actions}
+        elements={elements}
+        messages={messages}
+        autoScroll={autoScroll}
+        onFeedbackUpdated={onFeedbackUpdated}
+        callAction={callActionWithToast}
+        setAutoScroll={setAutoScroll}
+      />
+    </>
   );
 };
 
@@ -3,6 +3,7 @@ import { DefaultValue, atom, selector } from 'recoil';
 import { Socket } from 'socket.io-client';
 import { v4 as uuidv4 } from 'uuid';
 
+import type { IPageInfo } from './api';
 import {
   IAction,
   IAsk,
@@ -26,6 +27,12 @@ export const threadIdToResumeState = atom<string | undefined>({
   default: undefined
 });
 
+// Older steps of the resumed thread still to load
+export const threadPageInfoState = atom<IPageInfo | undefined>({
+  key: 'ThreadPageInfo',
+  default: undefined
+});
+
 export const chatProfileState = atom<string | undefined>({
   key: 'ChatProfile',
   default: undefined
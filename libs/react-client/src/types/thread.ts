@@ -1,3 +1,5 @@
+import type { IPageInfo } from '../api';
+
 import { IElement } from './element';
 import { IStep } from './step';
 import { IUser } from './user';
@@ -10,4 +12,12 @@ export interface IThread {
   metadata?: Record<string, any>;
   steps: IStep[];
   elements?: IElement[];
+  // Set when the thread is sent page by page, from the most recent steps
+  pageInfo?: IPageInfo;
+}
+
+export interface IThreadPage {
+  steps: IStep[];
+  elements: IElement[];
+  pageInfo: IPageInfo;
 }
@@ -1,5 +1,10 @@
 import { useCallback } from 'react';
-import { useRecoilValue, useResetRecoilState, useSetRecoilState } from 'recoil';
+import {
+  useRecoilState,
+  useRecoilValue,
+  useResetRecoilState,
+  useSetRecoilState
+} from 'recoil';
 import {
   accessTokenState,
   actionState,
@@ -15,9 +20,18 @@ import {
   sessionState,
   tasklistState,
   threadIdToResumeState,
+  threadPageInfoState,
   tokenCountState
 } from 'src/state';
-import { IAction, IFileRef, IStep } from 'src/types';
+import {
+  IAction,
+  IAvatarElement,
+  IFileRef,
+  IMessageElement,
+  IStep,
+  ITasklistElement,
+  IThreadPage
+} from 'src/types';
 import { addMessage } from 'src/utils/message';
 
 import { ChainlitAPI } from './api';
@@ -27,6 +41,8 @@ const useChatInteract = () => {
   const session = useRecoilValue(sessionState);
   const askUser = useRecoilValue(askUserState);
   const sessionId = useRecoilValue(sessionIdState);
+  const [threadPageInfo, setThreadPageInfo] =
+    useRecoilState(threadPageInfoState);
 
   const resetChatSettings = useResetRecoilState(chatSettingsInputsState);
   const resetSessionId = useResetRecoilState(sessionIdState);
@@ -46,6 +62,7 @@ const useChatInteract = () => {
     session?.socket.emit('clear_session');
     session?.socket.disconnect();
     setIdToResume(undefined);
+    setThreadPageInfo(undefined);
     resetSessionId();
     setFirstUserInteraction(undefined);
     setMessages([]);
@@ -116,6 +133,50 @@ const useChatInteract = () => {
     [session?.socket]
   );
 
+  const loadOlderMessages = useCallback(() => {
+    const socket = session?.socket;
+    if (!socket || !threadPageInfo?.hasNextPage) return;
+
+    return new Promise<void>((resolve) => {
+      socket.emit(
+        'load_thread_page',
+        { cursor: threadPageInfo.endCursor },
+        (page?: IThreadPage) => {
+          if (!page) {
+            setThreadPageInfo(undefined);
+            return resolve();
+          }
+          let olderMessages: IStep[] = [];
+          for (const step of page.steps) {
+            olderMessages = addMessage(olderMessages, step);
+          }
+          setMessages((oldMessages) => [...olderMessages, ...oldMessages]);
+          const elements = page.elements || [];
+          setAvatars((oldAvatars) => [
+            ...(elements as IAvatarElement[]).filter(
+              (e) => e.type === 'avatar'
+            ),
+            ...oldAvatars
+          ]);
+          setTasklists((oldTasklists) => [
+            ...(elements as ITasklistElement[]).filter(
+              (e) => e.type === 'tasklist'
+            ),
+            ...oldTasklists
+          ]);
+          setElements((oldElements) => [
+            ...(elements as IMessageElement[]).filter(
+              (e) => ['avatar', 'tasklist'].indexOf(e.type) === -1
+            ),
+            ...oldElements
+          ]);
+          setThreadPageInfo(page.pageInfo);
+          resolve();
+        }
+      );
+    });
+  }, [session?.socket, threadPageInfo]);
+
   const uploadFile = useCallback(
     (
       client: ChainlitAPI,
@@ -131,6 +192,7 @@ const useChatInteract = () => {
     uploadFile,
     callAction,
     clear,
+    loadOlderMessages,
     replyMessage,
     sendMessage,
     stopTask,
@@ -1,14 +1,20 @@
 import { useRecoilValue } from 'recoil';
 
-import { firstUserInteraction, messagesState } from './state';
+import {
+  firstUserInteraction,
+  messagesState,
+  threadPageInfoState
+} from './state';
 
 const useChatMessages = () => {
   const messages = useRecoilValue(messagesState);
   const firstInteraction = useRecoilValue(firstUserInteraction);
+  const threadPageInfo = useRecoilValue(threadPageInfoState);
 
   return {
     messages,
-    firstInteraction
+    firstInteraction,
+    hasOlderMessages: !!threadPageInfo?.hasNextPage
   };
 };
 
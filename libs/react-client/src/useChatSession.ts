@@ -23,6 +23,7 @@ import {
   sessionState,
   tasklistState,
   threadIdToResumeState,
+  threadPageInfoState,
   tokenCountState
 } from 'src/state';
 import {
@@ -62,6 +63,7 @@ const useChatSession = () => {
   const setActions = useSetRecoilState(actionState);
   const setChatSettingsInputs = useSetRecoilState(chatSettingsInputsState);
   const setTokenCount = useSetRecoilState(tokenCountState);
+  const setThreadPageInfo = useSetRecoilState(threadPageInfoState);
   const [chatProfile, setChatProfile] = useRecoilState(chatProfileState);
   const idToResume = useRecoilValue(threadIdToResumeState);
 
@@ -77,13 +79,17 @@ const useChatSession = () => {
     }) => {
       const socket = io(client.httpEndpoint, {
         path: '/ws/socket.io',
-        extraHeaders: {
-          Authorization: accessToken || '',
-          'X-Chainlit-Client-Type': client.type,
-          'X-Chainlit-Session-Id': sessionId,
-          'X-Chainlit-Thread-Id': idToResume || '',
-          'user-env': JSON.stringify(userEnv),
-          'X-Chainlit-Chat-Profile': chatProfile || ''
+        // A websocket is a single connection to one server worker, unlike the
+        // polling requests, which could reach a worker unaware of the session
+        transports: ['websocket'],
+        // Browsers can not set headers on websockets
+        auth: {
+          accessToken: accessToken || '',
+          clientType: client.type,
+          sessionId,
+          threadId: idToResume || '',
+          userEnv: JSON.stringify(userEnv),
+          chatProfile: chatProfile || ''
         }
       });
       setSession((old) => {
@@ -126,6 +132,7 @@ const useChatSession = () => {
           setChatProfile(thread.metadata?.chat_profile);
         }
         setMessages(messages);
+        setThreadPageInfo(thread.pageInfo);
         const elements = thread.elements || [];
         setAvatars(
           (elements as IAvatarElement[]).filter((e) => e.type === 'avatar')